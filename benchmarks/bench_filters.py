@@ -0,0 +1,83 @@
+"""Benchmarks for deal filtering, columnar store against the Python loop.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_filters --sizes 100000 1000000
+
+Results are appended to ``--output`` like bench_parse.
+"""
+import argparse
+import time
+
+from benchmarks.bench_parse import DEFAULT_OUTPUT, _make_scraper, _quiet, synthetic_promotions, write_results
+from deal_store import DealStore, filter_deals
+
+
+DEFAULT_SIZES = [100000, 1000000]
+# Distinct deals parsed once and copied to reach each size
+DEAL_POOL = 10000
+
+CRITERIA = {
+    "discount": {"min_discount": 30},
+    "combined": {
+        "min_price": 5, "max_price": 100, "min_discount": 30,
+        "site": "www.amazon.es", "category": "Gaming & Accessories", "badge": "Deal",
+    },
+}
+
+
+def synthetic_deals(count):
+    scraper = _make_scraper()
+    with _quiet():
+        pool = scraper._extractor.extract(synthetic_promotions(min(count, DEAL_POOL)), scraper.category)
+    return [pool[index % len(pool)].copy() for index in range(count)]
+
+
+def _best(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run(sizes, repeat=5):
+    results = []
+    for size in sizes:
+        deals = synthetic_deals(size)
+        started = time.perf_counter()
+        store = DealStore(deals)
+        build_seconds = time.perf_counter() - started
+
+        for name, criteria in CRITERIA.items():
+            store_seconds = _best(lambda: store.filter(**criteria), repeat)
+            loop_seconds = _best(lambda: filter_deals(deals, **criteria), max(1, repeat // 2))
+            results.append({
+                "benchmark": "filter",
+                "criteria": name,
+                "deals": size,
+                "matches": store.count(**criteria),
+                "store_ms": round(store_seconds * 1000, 3),
+                "loop_ms": round(loop_seconds * 1000, 3),
+                "build_seconds": round(build_seconds, 3),
+            })
+            print(f"   filter {name:<9} {size:>8} deals: store {results[-1]['store_ms']}ms, "
+                  f"loop {results[-1]['loop_ms']}ms ({results[-1]['matches']} matches)")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark deal filtering")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    write_results(results, args.output)
+    print(f"✓ Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Benchmarks for promotion parsing and the response interception path.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_parse --sizes 1000 10000 100000
+
+Every run appends one JSON line per measurement to ``--output`` (default
+``benchmarks/results.jsonl``), tagged with the git commit, so results can be
+compared across changes.
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from fake_amazon import FakeDealsServer
+from scraper import AmazonDealsScraper
+
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_OUTPUT = os.path.join("benchmarks", "results.jsonl")
+DEFAULT_RECORDINGS = "recordings"
+# Distinct synthetic promotions kept in memory; larger runs cycle through them
+SYNTHETIC_POOL = 10000
+BENCH_URL = "https://www.amazon.es/-/en/deals"
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Silence the scraper's progress output while measuring"""
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def _make_scraper():
+    with _quiet():
+        return AmazonDealsScraper(base_url=BENCH_URL, category="Gaming & Accessories")
+
+
+def parsers():
+    """Return {name: function(scraper, promotions) -> deals} for every parser under test"""
+    def parse_promotion(scraper, promotions):
+        return [scraper.parse_promotion(promo) for promo in promotions]
+
+    def extractor(scraper, promotions):
+        return scraper._extractor.extract(promotions, scraper.category)
+
+    return {"parse_promotion": parse_promotion, "extractor": extractor}
+
+
+def synthetic_promotions(count):
+    server = FakeDealsServer(deals_per_category=count)
+    pool = [server.promotion("", index) for index in range(min(count, SYNTHETIC_POOL))]
+    return [pool[index % len(pool)] for index in range(count)]
+
+
+def synthetic_pages(count, page_size):
+    """Yield raw response bodies holding ``count`` distinct promotions"""
+    server = FakeDealsServer(deals_per_category=count, page_size=page_size)
+    for start in range(0, count, page_size):
+        promotions = [server.promotion("", index) for index in range(start, min(start + page_size, count))]
+        yield json.dumps({"entity": {"rankedPromotions": promotions, "hasMore": True}}).encode("utf-8")
+
+
+def recorded_pages(directory):
+    """Return the raw promotions bodies saved by ``traffic_replay.py record``"""
+    bodies = []
+    for path in sorted(glob.glob(os.path.join(directory, "**", "promotions", "*.json"), recursive=True)):
+        with open(path, 'rb') as f:
+            bodies.append(f.read())
+    return bodies
+
+
+def recorded_promotions(bodies, count):
+    pool = []
+    for body in bodies:
+        pool.extend(json.loads(body).get("entity", {}).get("rankedPromotions", []))
+    if not pool:
+        return []
+    return [pool[index % len(pool)] for index in range(count)]
+
+
+def bench_parse(name, parse, promotions, repeat):
+    """Throughput and memory of parsing ``promotions`` into deals"""
+    scraper = _make_scraper()
+    count = len(promotions)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse(scraper, promotions)
+        timings.append(time.perf_counter() - started)
+
+    # Blocks still allocated afterwards are the deals themselves
+    blocks_before = sys.getallocatedblocks()
+    deals = parse(scraper, promotions)
+    retained_blocks = sys.getallocatedblocks() - blocks_before
+    del deals
+
+    tracemalloc.start()
+    parse(scraper, promotions)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        "benchmark": "parse",
+        "parser": name,
+        "promotions": count,
+        "seconds": round(best, 6),
+        "deals_per_second": round(count / best) if best else None,
+        "retained_blocks_per_deal": round(retained_blocks / count, 2),
+        "peak_bytes_per_deal": round(peak / count, 1),
+    }
+
+
+class _FakeRequest:
+    def __init__(self, url):
+        self.url = url
+
+
+class _FakeResponse:
+    status = 200
+
+    def __init__(self, url, body):
+        self.url = url
+        self.request = _FakeRequest(url)
+        self._body = body
+
+    async def body(self):
+        return self._body
+
+    async def json(self):
+        return json.loads(self._body)
+
+
+class _FakePage:
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+
+async def _run_handler(bodies):
+    scraper = _make_scraper()
+    page = _FakePage()
+    await scraper.intercept_api_calls(page)
+    handle_request = page.handlers["request"]
+    handle_response = page.handlers["response"]
+
+    latencies = []
+    with _quiet():
+        for body in bodies:
+            response = _FakeResponse(scraper.api_url, body)
+            started = time.perf_counter()
+            handle_request(response.request)
+            await handle_response(response)
+            latencies.append(time.perf_counter() - started)
+    return latencies, len(scraper.deals)
+
+
+def bench_handler(bodies):
+    """Per-response latency of the interception handler, JSON decoding included"""
+    latencies, deals = asyncio.run(_run_handler(bodies))
+    total = sum(latencies)
+    ordered = sorted(latencies)
+    return {
+        "benchmark": "handler",
+        "responses": len(latencies),
+        "deals": deals,
+        "seconds": round(total, 6),
+        "deals_per_second": round(deals / total) if total else None,
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, page_size=100, repeat=3, recordings=DEFAULT_RECORDINGS, only=None):
+    """Run every benchmark and return the result records"""
+    results = []
+    recorded = recorded_pages(recordings)
+    if not recorded:
+        print(f"ℹ️  No recordings in {recordings}, benchmarking synthetic payloads only")
+
+    for size in sizes:
+        sources = {"synthetic": synthetic_promotions(size)}
+        if recorded:
+            sources["recorded"] = recorded_promotions(recorded, size)
+
+        for source, promotions in sources.items():
+            for name, parse in parsers().items():
+                if only and name not in only:
+                    continue
+                result = bench_parse(name, parse, promotions, repeat)
+                result["source"] = source
+                results.append(result)
+                print(f"   parse   {name:<20} {source:<9} {size:>8} promotions: "
+                      f"{result['deals_per_second']:>9} deals/s, "
+                      f"{result['retained_blocks_per_deal']} blocks/deal, "
+                      f"{result['peak_bytes_per_deal']} peak B/deal")
+
+        result = bench_handler(list(synthetic_pages(size, page_size)))
+        result.update(source="synthetic", promotions=size, page_size=page_size)
+        results.append(result)
+        print(f"   handler {'intercept_api_calls':<20} {'synthetic':<9} {size:>8} promotions: "
+              f"{result['deals_per_second']:>9} deals/s, p50 {result['p50_ms']}ms, "
+              f"p95 {result['p95_ms']}ms, max {result['max_ms']}ms")
+
+    return results
+
+
+def write_results(results, path):
+    meta = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps({**meta, **result}) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark promotion parsing and interception")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="promotion counts to benchmark (up to 1000000)")
+    parser.add_argument("--page-size", type=int, default=100, help="promotions per response for the handler")
+    parser.add_argument("--repeat", type=int, default=3, help="parse runs per size; the best is kept")
+    parser.add_argument("--recordings", default=DEFAULT_RECORDINGS, help="traffic_replay.py recordings to include")
+    parser.add_argument("--parser", action="append", help="only run these parsers")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.page_size, args.repeat, args.recordings, args.parser)
+    write_results(results, args.output)
+    print(f"✓ Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
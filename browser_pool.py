@@ -0,0 +1,203 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright
+
+
+class BrowserPool:
+    """Long-lived Chromium instance that hands out isolated contexts and pages.
+
+    The browser is launched once and shared by every scraper that receives the
+    pool. It is relaunched when it crashes or disconnects, and recycled after
+    ``max_contexts_per_browser`` contexts so that a long-running bot does not
+    accumulate renderer memory forever. A recycled browser stays open until the
+    contexts still running on it are closed.
+    """
+
+    def __init__(self, headless=True, max_contexts_per_browser=100, launch_options=None):
+        self.headless = headless
+        self.max_contexts_per_browser = max_contexts_per_browser
+        self.launch_options = launch_options or {}
+        self.launches = 0
+
+        self._playwright = None
+        self._browser = None
+        self._contexts_served = 0
+        self._open_contexts = {}
+        self._retired = set()
+        self._persistent_contexts = {}
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        """Start Playwright and launch the shared browser if needed"""
+        async with self._lock:
+            await self._ensure_browser()
+        return self
+
+    def is_healthy(self):
+        """Return True when the shared browser is launched and connected"""
+        return self._browser is not None and self._browser.is_connected()
+
+    async def _ensure_browser(self):
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+
+        if self.is_healthy():
+            if self._contexts_served < self.max_contexts_per_browser:
+                return self._browser
+            print(f"♻️  Recycling browser after {self._contexts_served} contexts")
+            await self._retire(self._browser)
+        elif self._browser is not None:
+            print("⚠️  Browser disconnected, relaunching...")
+            await self._retire(self._browser)
+
+        print("🚀 Starting browser...")
+        self._browser = await self._playwright.chromium.launch(
+            headless=self.headless, **self.launch_options
+        )
+        self._open_contexts[self._browser] = 0
+        self._contexts_served = 0
+        self.launches += 1
+        return self._browser
+
+    async def _retire(self, browser):
+        if self._open_contexts.get(browser, 0) > 0 and browser.is_connected():
+            self._retired.add(browser)
+            return
+        await self._close_browser(browser)
+
+    async def _close_browser(self, browser):
+        self._open_contexts.pop(browser, None)
+        self._retired.discard(browser)
+        try:
+            await browser.close()
+        except Exception:
+            pass
+
+    async def _acquire(self):
+        async with self._lock:
+            browser = await self._ensure_browser()
+            self._contexts_served += 1
+            self._open_contexts[browser] += 1
+            return browser
+
+    async def _release(self, browser):
+        async with self._lock:
+            if browser not in self._open_contexts:
+                return
+            self._open_contexts[browser] -= 1
+            if browser in self._retired and self._open_contexts[browser] <= 0:
+                await self._close_browser(browser)
+
+    @asynccontextmanager
+    async def context(self, **context_options):
+        """Yield a fresh browser context on the shared browser"""
+        browser = await self._acquire()
+        try:
+            try:
+                context = await browser.new_context(**context_options)
+            except Exception:
+                if browser.is_connected():
+                    raise
+                # The browser died between the health check and now; retry once
+                await self._release(browser)
+                browser = await self._acquire()
+                context = await browser.new_context(**context_options)
+
+            try:
+                yield context
+            finally:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+        finally:
+            await self._release(browser)
+
+    @asynccontextmanager
+    async def page(self, **context_options):
+        """Yield a page in its own context on the shared browser"""
+        async with self.context(**context_options) as context:
+            page = await context.new_page()
+            yield page
+
+    async def _get_persistent_context(self, user_data_dir):
+        async with self._lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+
+            context = self._persistent_contexts.get(user_data_dir)
+            if context is not None:
+                return context
+
+            print(f"🚀 Starting browser with profile {user_data_dir}...")
+            context = await self._playwright.chromium.launch_persistent_context(
+                user_data_dir, headless=self.headless, **self.launch_options
+            )
+            def forget(_):
+                # Forget the context if it dies so the next page relaunches it
+                if self._persistent_contexts.get(user_data_dir) is context:
+                    del self._persistent_contexts[user_data_dir]
+
+            context.on("close", forget)
+            self._persistent_contexts[user_data_dir] = context
+            self.launches += 1
+            return context
+
+    def has_persistent_context(self, user_data_dir):
+        """Return True while a persistent context for ``user_data_dir`` is open"""
+        return user_data_dir in self._persistent_contexts
+
+    @asynccontextmanager
+    async def persistent_page(self, user_data_dir):
+        """Yield a page in the long-lived persistent context for ``user_data_dir``.
+
+        Pages of the same profile share cookies and the HTTP disk cache, which
+        is the point of using one.
+        """
+        context = await self._get_persistent_context(user_data_dir)
+        try:
+            page = await context.new_page()
+        except Exception:
+            # The context was closed underneath us; relaunch once
+            self._persistent_contexts.pop(user_data_dir, None)
+            context = await self._get_persistent_context(user_data_dir)
+            page = await context.new_page()
+
+        try:
+            yield page
+        finally:
+            try:
+                await page.close()
+            except Exception:
+                pass
+
+    async def close_persistent(self, user_data_dir):
+        """Close the persistent context for ``user_data_dir`` if it is running"""
+        async with self._lock:
+            context = self._persistent_contexts.pop(user_data_dir, None)
+        if context is not None:
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+    async def close(self):
+        """Close every browser and stop Playwright"""
+        for user_data_dir in list(self._persistent_contexts):
+            await self.close_persistent(user_data_dir)
+
+        async with self._lock:
+            for browser in list(self._open_contexts):
+                await self._close_browser(browser)
+            self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
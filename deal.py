@@ -0,0 +1,355 @@
+import sys
+from decimal import Decimal, InvalidOperation
+
+
+DEFAULT_CURRENCY = "EUR"
+CURRENCY_SYMBOLS = {"EUR": "€", "GBP": "£", "USD": "$", "JPY": "¥", "INR": "₹"}
+_SYMBOL_CURRENCIES = {symbol: code for code, symbol in CURRENCY_SYMBOLS.items()}
+
+IMAGE_URL = "https://m.media-amazon.com/images/I/{}._AC_SF226,226_QL85_.jpg"
+
+# The string fields every deal has always had, in their historical order
+DISPLAY_FIELDS = (
+    "title", "asin", "product_url", "discount", "current_price", "original_price",
+    "deal_badge", "category", "brand_id", "image_url", "marketplace_id", "site", "base_url",
+)
+# Numeric fields, stored alongside the display fields in exports and Mongo
+NUMERIC_FIELDS = ("price_cents", "basis_price_cents", "currency", "discount_percent")
+
+
+def parse_cents(amount):
+    """Return an API amount (number or decimal string) in integer cents, or None"""
+    if type(amount) is str:
+        # Fast path for the usual "12.99"
+        whole, dot, fraction = amount.partition(".")
+        if whole.isdecimal() and len(fraction) <= 2 and (fraction.isdecimal() or not fraction):
+            return int(whole) * 100 + (int(fraction.ljust(2, "0")) if fraction else 0)
+    if amount is None or amount == "" or isinstance(amount, bool):
+        return None
+    if isinstance(amount, int):
+        return amount * 100
+    try:
+        return int((Decimal(str(amount)) * 100).to_integral_value())
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def parse_price(text):
+    """Return (cents, currency) for a display price such as "€12.99"; (None, None) for "N/A" """
+    if not text or text == "N/A":
+        return None, None
+    text = str(text).strip()
+    currency = _SYMBOL_CURRENCIES.get(text[:1])
+    if currency:
+        text = text[1:]
+    return parse_cents(text.replace(",", "")), currency
+
+
+def parse_discount(value):
+    """Return a discount as a number from 35, 35.5 or "35%"; None when missing"""
+    if value is None or value == "N/A" or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value or None
+    try:
+        number = float(str(value).strip().rstrip("%"))
+    except ValueError:
+        return None
+    return (int(number) if number.is_integer() else number) or None
+
+
+def format_price(cents, currency=DEFAULT_CURRENCY):
+    if cents is None:
+        return "N/A"
+    symbol = CURRENCY_SYMBOLS.get(currency or DEFAULT_CURRENCY, f"{currency} ")
+    return f"{symbol}{cents // 100}.{cents % 100:02d}"
+
+
+def format_discount(percent):
+    return f"{percent}%" if percent else "N/A"
+
+
+class Registry:
+    """Hands out small integer ids for values shared by many deals.
+
+    Deals store the id instead of their own reference to the value, and
+    every value is kept once. Ids are only meaningful inside one process;
+    Deals pickle and serialise with the values themselves.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._values = []
+
+    def id(self, value):
+        """Return the id of ``value``, registering it on first use"""
+        value_id = self._ids.get(value)
+        if value_id is None:
+            value_id = self._ids[value] = len(self._values)
+            self._values.append(value)
+        return value_id
+
+    def find(self, value):
+        """Return the id of ``value`` without registering it; None if unknown"""
+        return self._ids.get(value)
+
+    def value(self, value_id):
+        return self._values[value_id]
+
+    def values(self):
+        return list(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+
+# (marketplace_id, site name, base_url, product URL base) per site
+site_registry = Registry()
+category_registry = Registry()
+
+
+def shared(value):
+    """Intern a string that many deals repeat (badge, brand, currency) so it is stored once"""
+    return sys.intern(value) if type(value) is str else value
+
+
+def site_id(marketplace_id=None, site=None, base_url=None, url_base=None):
+    return site_registry.id((marketplace_id, site, base_url, url_base))
+
+
+def category_id(category):
+    return None if category is None else category_registry.id(category)
+
+
+def _site_property(index, doc):
+    def getter(self):
+        return None if self.site_id is None else site_registry.value(self.site_id)[index]
+
+    def setter(self, value):
+        site = list(site_registry.value(self.site_id)) if self.site_id is not None else [None] * 4
+        site[index] = value
+        self.site_id = site_registry.id(tuple(site))
+
+    return property(getter, setter, doc=doc)
+
+
+class Deal:
+    """One deal, with prices kept as integer cents and the discount as a number.
+
+    Display strings (``current_price``, ``discount``, ``product_url``...) are
+    only built when asked for, and the site and category are ids into the
+    ``site_registry``/``category_registry``. For compatibility with code written
+    against the old dict deals, a Deal also reads like a mapping:
+    ``deal["current_price"]``, ``deal.get(...)``, ``dict(deal)`` and
+    ``{**deal}`` give the display fields ("N/A" when missing) plus the
+    numeric ones.
+    """
+
+    __slots__ = (
+        "asin", "title", "price_cents", "basis_price_cents", "currency", "discount_percent",
+        "deal_badge", "category_id", "brand_id", "image_id", "site_id", "categories",
+    )
+
+    def __init__(self, asin=None, title=None, price_cents=None, basis_price_cents=None,
+                 currency=DEFAULT_CURRENCY, discount_percent=None, deal_badge=None, category_id=None,
+                 brand_id=None, image_id=None, site_id=None, categories=None):
+        self.asin = asin
+        self.title = title
+        self.price_cents = price_cents
+        self.basis_price_cents = basis_price_cents
+        self.currency = currency
+        self.discount_percent = discount_percent
+        self.deal_badge = deal_badge
+        self.category_id = category_id
+        self.brand_id = brand_id
+        self.image_id = image_id
+        self.site_id = site_id
+        self.categories = categories
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a Deal from a dict deal, old (display strings only) or new"""
+        if isinstance(data, Deal):
+            return data
+
+        def text(key):
+            value = data.get(key)
+            return None if value in (None, "", "N/A") else value
+
+        price_cents, currency = parse_price(data.get("current_price"))
+        basis_price_cents, basis_currency = parse_price(data.get("original_price"))
+        if data.get("price_cents") is not None or data.get("basis_price_cents") is not None:
+            price_cents = data.get("price_cents")
+            basis_price_cents = data.get("basis_price_cents")
+        currency = data.get("currency") or currency or basis_currency or DEFAULT_CURRENCY
+
+        asin = text("asin")
+        url_base = None
+        product_url = text("product_url")
+        if product_url and asin and product_url.endswith(f"/dp/{asin}"):
+            url_base = product_url[: -len(f"/dp/{asin}")]
+
+        image_id = None
+        image_url = text("image_url")
+        if image_url:
+            prefix, _, suffix = IMAGE_URL.partition("{}")
+            if image_url.startswith(prefix) and image_url.endswith(suffix):
+                image_id = image_url[len(prefix):-len(suffix)]
+
+        discount = data.get("discount_percent")
+        if discount is None:
+            discount = parse_discount(data.get("discount"))
+
+        deal_categories = data.get("categories")
+        return cls(
+            asin=asin,
+            title=text("title"),
+            price_cents=price_cents,
+            basis_price_cents=basis_price_cents,
+            currency=shared(currency),
+            discount_percent=discount,
+            deal_badge=shared(text("deal_badge")),
+            category_id=category_id(text("category")),
+            brand_id=shared(text("brand_id")),
+            image_id=image_id,
+            site_id=site_id(text("marketplace_id"), text("site"), text("base_url"), url_base),
+            categories=list(deal_categories) if isinstance(deal_categories, list) else None,
+        )
+
+    # Site and category, resolved through the registries
+
+    marketplace_id = _site_property(0, "Marketplace id of the site the deal was scraped from")
+    site = _site_property(1, "Name of the site the deal was scraped from")
+    base_url = _site_property(2, "Deals page the deal was scraped from")
+    url_base = _site_property(3, 'Scheme and host product URLs are built on, e.g. "https://www.amazon.es"')
+
+    @property
+    def category(self):
+        return None if self.category_id is None else category_registry.value(self.category_id)
+
+    @category.setter
+    def category(self, value):
+        self.category_id = category_id(value)
+
+    # Display values
+
+    @property
+    def current_price(self):
+        return format_price(self.price_cents, self.currency)
+
+    @property
+    def original_price(self):
+        return format_price(self.basis_price_cents, self.currency)
+
+    @property
+    def discount(self):
+        return format_discount(self.discount_percent)
+
+    @property
+    def product_url(self):
+        url_base = self.url_base
+        if not self.asin or not url_base:
+            return "N/A"
+        return f"{url_base}/dp/{self.asin}"
+
+    @property
+    def image_url(self):
+        return IMAGE_URL.format(self.image_id) if self.image_id else "N/A"
+
+    def to_dict(self):
+        """Return the deal as a plain dict: display fields, numeric fields and categories"""
+        data = {key: self[key] for key in DISPLAY_FIELDS}
+        for key in NUMERIC_FIELDS:
+            data[key] = getattr(self, key)
+        if self.categories is not None:
+            data["categories"] = list(self.categories)
+        return data
+
+    def merge(self, other):
+        """Update this deal in place with the known values of a repeat of the same deal.
+
+        Returns whether any value changed. ``categories`` is left alone;
+        callers that track it combine it themselves.
+        """
+        changed = False
+        for slot in _MERGED_SLOTS:
+            value = getattr(other, slot)
+            if value is not None and value != "" and value != getattr(self, slot):
+                setattr(self, slot, value)
+                changed = True
+        return changed
+
+    def copy(self):
+        deal = Deal.__new__(Deal)
+        for slot in Deal.__slots__:
+            setattr(deal, slot, getattr(self, slot))
+        if self.categories is not None:
+            deal.categories = list(self.categories)
+        return deal
+
+    # Mapping interface for dict-era callers
+
+    def keys(self):
+        keys = DISPLAY_FIELDS + NUMERIC_FIELDS
+        return keys + ("categories",) if self.categories is not None else keys
+
+    def __getitem__(self, key):
+        if key in _STRING_FIELDS:
+            value = getattr(self, key)
+            return "N/A" if value is None else value
+        if key in _MAPPED_ATTRIBUTES:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in _MAPPED_ATTRIBUTES or key in _DERIVED:
+            raise KeyError(f"Deal field '{key}' cannot be set directly")
+        setattr(self, key, None if value == "N/A" else value)
+
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return value
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __eq__(self, other):
+        if not isinstance(other, Deal):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in Deal.__slots__)
+
+    def __repr__(self):
+        return f"Deal(asin={self.asin!r}, title={self.title!r}, price={self.current_price!r})"
+
+    def __getstate__(self):
+        # Ids do not survive the trip to another process; send the values
+        state = [getattr(self, slot) for slot in Deal.__slots__]
+        state[_CATEGORY_INDEX] = self.category
+        state[_SITE_INDEX] = None if self.site_id is None else site_registry.value(self.site_id)
+        return tuple(state)
+
+    def __setstate__(self, state):
+        state = list(state)
+        state[_CATEGORY_INDEX] = category_id(state[_CATEGORY_INDEX])
+        if state[_SITE_INDEX] is not None:
+            state[_SITE_INDEX] = site_registry.id(tuple(state[_SITE_INDEX]))
+        for slot, value in zip(Deal.__slots__, state):
+            setattr(self, slot, value)
+
+
+# Fields read back as "N/A" when missing
+_STRING_FIELDS = frozenset(("asin", "title", "deal_badge", "category", "brand_id", "marketplace_id", "site", "base_url"))
+_DERIVED = frozenset(("current_price", "original_price", "discount", "product_url", "image_url"))
+_MERGED_SLOTS = tuple(slot for slot in Deal.__slots__ if slot != "categories")
+_MAPPED_ATTRIBUTES = _STRING_FIELDS | _DERIVED | frozenset(NUMERIC_FIELDS) | {"categories"}
+_CATEGORY_INDEX = Deal.__slots__.index("category_id")
+_SITE_INDEX = Deal.__slots__.index("site_id")
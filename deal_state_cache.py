@@ -0,0 +1,106 @@
+import time
+from collections import OrderedDict
+
+from deal import DISPLAY_FIELDS, NUMERIC_FIELDS
+
+
+DEFAULT_MAX_SIZE = 200000
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+
+# Stored document fields the fingerprint covers; timestamps are left out
+FINGERPRINT_FIELDS = DISPLAY_FIELDS + NUMERIC_FIELDS + ("categories",)
+
+
+def deal_key(marketplace_id, site, asin):
+    return f"{marketplace_id}:{site}:{asin}"
+
+
+def document_key(document):
+    return deal_key(document.get("marketplace_id"), document.get("site"), document.get("asin"))
+
+
+def fingerprint(document):
+    """Hash of the stored fields of a deal document, equal for equal contents"""
+    values = []
+    for field in FINGERPRINT_FIELDS:
+        value = document.get(field)
+        values.append(tuple(value) if isinstance(value, list) else value)
+    return hash(tuple(values))
+
+
+class DealState:
+    """What the last write of a deal left in the collection"""
+
+    __slots__ = ("document_id", "current_price", "categories", "fingerprint", "expires")
+
+    def __init__(self, document_id, current_price, categories, fingerprint, expires):
+        self.document_id = document_id
+        self.current_price = current_price
+        self.categories = categories
+        self.fingerprint = fingerprint
+        self.expires = expires
+
+
+class DealStateCache:
+    """Bounded LRU of the last persisted state of deals, keyed by deal_key().
+
+    Lets the bot tell that a deal is unchanged without reading its document.
+    Entries expire after ``ttl_seconds`` so edits made to the collection by
+    anything else are picked up eventually.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, ttl_seconds=DEFAULT_TTL_SECONDS, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the DealState of ``key``, or None when unknown or expired"""
+        state = self._entries.get(key)
+        if state is None:
+            self.misses += 1
+            return None
+        if state.expires <= self.clock():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return state
+
+    def put(self, document, recent=True):
+        """Remember ``document`` (with its ``_id``) as the stored state of its deal.
+
+        ``recent=False`` files it as least recently used, for bulk loads that
+        come newest first.
+        """
+        key = document_key(document)
+        self._entries[key] = DealState(
+            document["_id"],
+            document.get("current_price"),
+            tuple(document.get("categories") or ()),
+            fingerprint(document),
+            self.clock() + self.ttl_seconds,
+        )
+        self._entries.move_to_end(key, last=recent)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, key):
+        self._entries.pop(key, None)
+
+    async def warm(self, collection):
+        """Load the most recently seen deals of ``collection``; returns how many"""
+        projection = {field: 1 for field in FINGERPRINT_FIELDS}
+        cursor = collection.find({}, projection).sort("last_seen", -1).limit(self.max_size)
+        count = 0
+        async for document in cursor:
+            self.put(document, recent=False)
+            count += 1
+        return count
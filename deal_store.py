@@ -0,0 +1,166 @@
+try:
+    import numpy as np
+except ImportError:  # optional, only needed for DealStore
+    np = None
+
+from deal import Registry, category_registry, site_registry
+
+
+# Column value for a missing price, category or badge
+MISSING = -1
+
+
+def filter_deals(deals, min_price=None, max_price=None, min_discount=None, site=None, category=None, badge=None):
+    """Plain Python version of DealStore.filter() for deals without a store"""
+    min_cents = None if min_price is None else round(min_price * 100)
+    max_cents = None if max_price is None else round(max_price * 100)
+    results = []
+    for deal in deals:
+        price = deal.price_cents
+        if min_cents is not None and (price is None or price < min_cents):
+            continue
+        if max_cents is not None and (price is None or price > max_cents):
+            continue
+        if min_discount is not None and (deal.discount_percent is None or deal.discount_percent < min_discount):
+            continue
+        if site is not None and site not in (deal.site, deal.marketplace_id):
+            continue
+        if category is not None and deal.category != category:
+            continue
+        if badge is not None and deal.deal_badge != badge:
+            continue
+        results.append(deal)
+    return results
+
+
+class DealStore:
+    """Columnar copy of a set of deals for vectorized filtering.
+
+    Prices, discounts and the site, category and badge codes live in NumPy
+    arrays (titles in a list alongside), so a filter is a handful of array
+    comparisons instead of a Python loop over every deal. Rows are appended
+    with extend() and refreshed with update() when a deal is merged in place.
+    Requires numpy.
+    """
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, deals=()):
+        if np is None:
+            raise RuntimeError("DealStore needs numpy: pip install numpy")
+        self.deals = []
+        self.titles = []
+        self._rows = {}
+        self._badges = Registry()
+        self._allocate(self.INITIAL_CAPACITY)
+        self.extend(deals)
+
+    def _allocate(self, capacity):
+        size = len(self.deals)
+
+        def resized(name, dtype):
+            column = np.empty(capacity, dtype=dtype)
+            if size:
+                column[:size] = getattr(self, name)[:size]
+            return column
+
+        self.price_cents = resized("price_cents", np.int64)
+        self.basis_price_cents = resized("basis_price_cents", np.int64)
+        self.discount = resized("discount", np.float32)
+        self.site_ids = resized("site_ids", np.int32)
+        self.category_ids = resized("category_ids", np.int32)
+        self.badge_ids = resized("badge_ids", np.int32)
+        self.capacity = capacity
+
+    def __len__(self):
+        return len(self.deals)
+
+    def _badge_id(self, badge):
+        return MISSING if badge is None else self._badges.id(badge)
+
+    def extend(self, deals):
+        """Append ``deals`` as new rows"""
+        deals = list(deals)
+        if not deals:
+            return
+        start = len(self.deals)
+        end = start + len(deals)
+        if end > self.capacity:
+            capacity = self.capacity
+            while capacity < end:
+                capacity *= 2
+            self._allocate(capacity)
+
+        count = len(deals)
+        self.price_cents[start:end] = np.fromiter(
+            (MISSING if deal.price_cents is None else deal.price_cents for deal in deals), np.int64, count)
+        self.basis_price_cents[start:end] = np.fromiter(
+            (MISSING if deal.basis_price_cents is None else deal.basis_price_cents for deal in deals), np.int64, count)
+        self.discount[start:end] = np.fromiter(
+            (np.nan if deal.discount_percent is None else deal.discount_percent for deal in deals), np.float32, count)
+        self.site_ids[start:end] = np.fromiter(
+            (MISSING if deal.site_id is None else deal.site_id for deal in deals), np.int32, count)
+        self.category_ids[start:end] = np.fromiter(
+            (MISSING if deal.category_id is None else deal.category_id for deal in deals), np.int32, count)
+        self.badge_ids[start:end] = np.fromiter(
+            (self._badge_id(deal.deal_badge) for deal in deals), np.int32, count)
+
+        for row, deal in enumerate(deals, start):
+            self._rows[id(deal)] = row
+        self.deals.extend(deals)
+        self.titles.extend(deal.title for deal in deals)
+
+    def update(self, deal):
+        """Rewrite the row of ``deal`` after it changed in place"""
+        row = self._rows.get(id(deal))
+        if row is None or self.deals[row] is not deal:
+            return
+        self.price_cents[row] = MISSING if deal.price_cents is None else deal.price_cents
+        self.basis_price_cents[row] = MISSING if deal.basis_price_cents is None else deal.basis_price_cents
+        self.discount[row] = np.nan if deal.discount_percent is None else deal.discount_percent
+        self.site_ids[row] = MISSING if deal.site_id is None else deal.site_id
+        self.category_ids[row] = MISSING if deal.category_id is None else deal.category_id
+        self.badge_ids[row] = self._badge_id(deal.deal_badge)
+        self.titles[row] = deal.title
+
+    def mask(self, min_price=None, max_price=None, min_discount=None, site=None, category=None, badge=None):
+        """Return a boolean array selecting the rows that match every given criterion.
+
+        Prices are in currency units (``max_price=20`` for 20€), ``site``
+        matches a site name or marketplace id.
+        """
+        size = len(self.deals)
+        mask = np.ones(size, dtype=bool)
+
+        if min_price is not None:
+            mask &= self.price_cents[:size] >= round(min_price * 100)
+        if max_price is not None:
+            prices = self.price_cents[:size]
+            mask &= (prices <= round(max_price * 100)) & (prices != MISSING)
+        if min_discount is not None:
+            # NaN (no discount) never compares true
+            mask &= self.discount[:size] >= min_discount
+        if site is not None:
+            site_ids = [
+                value_id for value_id, value in enumerate(site_registry.values())
+                if site in (value[0], value[1])
+            ]
+            if len(site_ids) == 1:
+                mask &= self.site_ids[:size] == site_ids[0]
+            else:
+                mask &= np.isin(self.site_ids[:size], site_ids)
+        if category is not None:
+            value_id = category_registry.find(category)
+            mask &= self.category_ids[:size] == (MISSING - 1 if value_id is None else value_id)
+        if badge is not None:
+            value_id = self._badges.find(badge)
+            mask &= self.badge_ids[:size] == (MISSING - 1 if value_id is None else value_id)
+        return mask
+
+    def filter(self, **criteria):
+        """Return the deals matching ``criteria`` (see mask()), in insertion order"""
+        deals = self.deals
+        return [deals[row] for row in np.flatnonzero(self.mask(**criteria))]
+
+    def count(self, **criteria):
+        return int(np.count_nonzero(self.mask(**criteria)))
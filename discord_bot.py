@@ -6,7 +6,7 @@ from collections import defaultdict
 from copy import deepcopy
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
 import discord
 from discord import HTTPException
@@ -14,12 +14,53 @@ from discord.errors import Forbidden, NotFound
 from discord.ext import commands, tasks
 from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
-
-from main import AmazonDealsScraper
+from pymongo import ASCENDING, DESCENDING, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from browser_pool import BrowserPool
+from deal import Deal, parse_price
+from deal_state_cache import DEFAULT_MAX_SIZE, DEFAULT_TTL_SECONDS, DealStateCache, deal_key, fingerprint
+from job_queue import DEFAULT_CYCLE_TIMEOUT, DEFAULT_DB_PATH, DEFAULT_MAX_ATTEMPTS, Coordinator, SQLiteBroker
+from scraper import AmazonDealsScraper
+from network_profile import active_profiles, reset_profiles
+from promotions_api import PromotionsApiClient
+from scrape_runner import (
+    ScrapeJob,
+    ScrapeResult,
+    build_scrape_jobs,
+    concurrency_settings,
+    run_scrape_jobs,
+)
+from title_index import TitleIndex
 
 
 logger = logging.getLogger("amazon_deals.discord_bot")
 
+# Deals listed in reply to !search
+SEARCH_RESULT_LIMIT = 10
+
+# Deals looked up with one $in query and written with one bulk_write
+DEAL_BATCH_SIZE = 1000
+# How long the persist stage waits for a batch to fill before storing it
+DEAL_BATCH_WAIT_SECONDS = 0.05
+
+# Bounds of the queues between the stages of a cycle: streamed deals and job
+# results, and deals waiting to be stored. Changes waiting to be announced are
+# not bounded, so Discord's send rate never holds back scraping
+RESULT_QUEUE_SIZE = 4
+DEAL_QUEUE_SIZE = 2 * DEAL_BATCH_SIZE
+
+# Identity of a stored deal; the ASIN prefix also serves the batched $in lookups
+DEAL_KEY_INDEX = [("asin", ASCENDING), ("marketplace_id", ASCENDING), ("site", ASCENDING)]
+
+# (keys, options) of the indexes the deals collection should have
+DEAL_INDEXES = [
+    (DEAL_KEY_INDEX, {"unique": True}),
+    ([("last_seen", ASCENDING)], {}),
+    # Best current deals of a marketplace
+    ([("marketplace_id", ASCENDING), ("discount_percent", DESCENDING)], {}),
+]
+
 
 DEFAULT_CONFIG = {
     "sites": [
@@ -44,6 +85,26 @@ class DealChange:
     changed_fields: Dict[str, Tuple[Optional[str], Optional[str]]]
 
 
+# Optional per-site settings copied through normalize_config untouched
+SITE_OPTIONAL_KEYS = (
+    "max_concurrency",
+    "api_replay",
+    "network_profile",
+    "single_page",
+    "browser_profile",
+)
+
+# Optional top-level settings copied through normalize_config untouched
+GLOBAL_OPTIONAL_KEYS = ("concurrency", "job_queue", "state_cache")
+
+
+def _with_global_settings(normalized: Dict, data: Dict) -> Dict:
+    for key in GLOBAL_OPTIONAL_KEYS:
+        if key in data:
+            normalized[key] = deepcopy(data[key])
+    return normalized
+
+
 def normalize_config(data: Dict) -> Dict:
     if not isinstance(data, dict):
         return deepcopy(DEFAULT_CONFIG)
@@ -60,31 +121,33 @@ def normalize_config(data: Dict) -> Dict:
             "categories": categories,
             "scrape_all": data.get("scrape_all", False),
         }
-        return {"sites": [fallback_site]}
+        return _with_global_settings({"sites": [fallback_site]}, data)
 
     normalized_sites: List[Dict] = []
     for site in sites:
         if not isinstance(site, dict):
             continue
 
-        normalized_sites.append(
-            {
-                "name": site.get("name") or "Amazon Site",
-                "base_url": site.get("base_url", AmazonDealsScraper.DEFAULT_BASE_URL),
-                "marketplace_id": site.get(
-                    "marketplace_id", AmazonDealsScraper.DEFAULT_MARKETPLACE_ID
-                ),
-                "categories": site.get(
-                    "categories", DEFAULT_CONFIG["sites"][0]["categories"]
-                ),
-                "scrape_all": site.get("scrape_all", False),
-            }
-        )
+        normalized_site = {
+            "name": site.get("name") or "Amazon Site",
+            "base_url": site.get("base_url", AmazonDealsScraper.DEFAULT_BASE_URL),
+            "marketplace_id": site.get(
+                "marketplace_id", AmazonDealsScraper.DEFAULT_MARKETPLACE_ID
+            ),
+            "categories": site.get(
+                "categories", DEFAULT_CONFIG["sites"][0]["categories"]
+            ),
+            "scrape_all": site.get("scrape_all", False),
+        }
+        for key in SITE_OPTIONAL_KEYS:
+            if key in site:
+                normalized_site[key] = site[key]
+        normalized_sites.append(normalized_site)
 
     if not normalized_sites:
         return deepcopy(DEFAULT_CONFIG)
 
-    return {"sites": normalized_sites}
+    return _with_global_settings({"sites": normalized_sites}, data)
 
 
 def load_config(path: str = "config.json") -> Dict:
@@ -138,6 +201,9 @@ def ensure_env_vars() -> Tuple[str, int, str, str]:
 class DealMonitorBot(commands.Bot):
     def __init__(self, *, channel_id: int, mongo_uri: str, mongo_db: str):
         intents = discord.Intents.default()
+        # !search reads message text, which needs the privileged Message Content
+        # intent (also enabled for the bot in the Discord developer portal)
+        intents.message_content = True
         super().__init__(command_prefix=commands.when_mentioned_or("!"), intents=intents)
 
         self.channel_id = channel_id
@@ -147,15 +213,77 @@ class DealMonitorBot(commands.Bot):
 
         self.deals_channel: Optional[discord.abc.Messageable] = None
         self.config = load_config()
+        # Launched lazily on the first scrape and reused by every later cycle
+        self.browser_pool = BrowserPool()
+        self.api_client = PromotionsApiClient()
+        # Deals of the latest scrape cycle, keyed like its deals, for !search
+        self.title_index = TitleIndex()
+        # Last stored state of recent deals, so unchanged ones need no read;
+        # "state_cache": false in config.json turns it off
+        cache_settings = self.config.get("state_cache", {})
+        self.state_cache: Optional[DealStateCache] = None
+        if cache_settings is not False:
+            cache_settings = cache_settings if isinstance(cache_settings, dict) else {}
+            self.state_cache = DealStateCache(
+                max_size=cache_settings.get("max_size", DEFAULT_MAX_SIZE),
+                ttl_seconds=cache_settings.get("ttl_seconds", DEFAULT_TTL_SECONDS),
+            )
+        self.add_command(search_command)
 
     async def setup_hook(self) -> None:
+        try:
+            await self.ensure_indexes()
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            logger.exception("Could not check the deals collection indexes: %s", exc)
+        if self.state_cache is not None:
+            try:
+                count = await self.state_cache.warm(self.deals)
+                logger.info("Loaded the stored state of %d deals", count)
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                logger.exception("Could not load stored deal states: %s", exc)
         self.scrape_loop.start()
         self.loop.create_task(self.initial_sync())
 
     async def close(self) -> None:
         await super().close()
+        await self.browser_pool.close()
+        await self.api_client.close()
         self.mongo_client.close()
 
+    async def ensure_indexes(self) -> Dict[str, str]:
+        """Create the missing DEAL_INDEXES and log which were found or created.
+
+        Returns index name -> "found", "created" or "not unique" (the deal
+        key index when stored duplicates prevent a unique one).
+        """
+        existing = {}
+        async for index in self.deals.list_indexes():
+            existing[tuple(index["key"].items())] = index
+
+        report: Dict[str, str] = {}
+        for keys, options in DEAL_INDEXES:
+            found = existing.get(tuple(keys))
+            if found is not None:
+                status = "found"
+                if options.get("unique") and not found.get("unique"):
+                    status = "not unique"
+                report[found["name"]] = status
+                continue
+            try:
+                name = await self.deals.create_index(keys, **options)
+                report[name] = "created"
+            except OperationFailure as exc:
+                if not options.get("unique"):
+                    raise
+                # Duplicates stored before the index existed; index the key anyway
+                logger.warning("Could not create a unique deal key index: %s", exc)
+                name = await self.deals.create_index(keys)
+                report[name] = "not unique"
+
+        for name, status in report.items():
+            logger.info("Deals index %s: %s", name, status)
+        return report
+
     @tasks.loop(hours=1)
     async def scrape_loop(self) -> None:
         await self.scrape_and_process(reason="Scheduled hourly sync")
@@ -197,6 +325,13 @@ class DealMonitorBot(commands.Bot):
             )
 
     async def scrape_and_process(self, *, reason: str) -> None:
+        """Run one cycle as concurrent stages: scrape, merge, persist and notify.
+
+        Deals flow through bounded queues as soon as the scraper intercepts
+        them (or, with a job queue, as each worker's result comes in), so
+        deals are stored and changes announced while scraping goes on, and a
+        slow stage holds back the ones before it.
+        """
         logger.info("Starting scrape cycle: %s", reason)
 
         sites = self.config.get("sites", [])
@@ -204,182 +339,393 @@ class DealMonitorBot(commands.Bot):
             logger.warning("No sites configured for scraping")
             return
 
-        collected: Dict[str, Dict] = {}
+        collected: Dict[Tuple[int, str], Deal] = {}
 
-        for site_idx, site in enumerate(sites, start=1):
-            site_name = site.get("name", "Amazon Site")
-            base_url = site.get("base_url", AmazonDealsScraper.DEFAULT_BASE_URL)
-            marketplace_id = site.get(
-                "marketplace_id", AmazonDealsScraper.DEFAULT_MARKETPLACE_ID
-            )
-            categories = (
-                AmazonDealsScraper.CATEGORIES
-                if site.get("scrape_all")
-                else site.get("categories", [])
-            )
+        for site in sites:
+            if not site.get("scrape_all") and not site.get("categories"):
+                logger.warning(
+                    "No categories configured for site '%s'", site.get("name", "Amazon Site")
+                )
 
-            if not categories:
-                logger.warning("No categories configured for site '%s'", site_name)
-                continue
+        # Network profile counters are reported per cycle
+        reset_profiles()
+        jobs = build_scrape_jobs(sites)
+        settings = concurrency_settings(self.config)
+        logger.info(
+            "Scraping %d categories across %d sites (%d at once, %d per site)",
+            len(jobs),
+            len(sites),
+            settings["global"],
+            settings["per_site"],
+        )
 
-            logger.info(
-                "Site '%s' (%d/%d) scraping %d categories",
-                site_name,
-                site_idx,
-                len(sites),
-                len(categories),
-            )
+        # None marks the end of each queue's input. The scrape stage hands on
+        # (arrival time, item) pairs: single streamed deals and job results
+        results_queue: "asyncio.Queue[Optional[Tuple[float, Union[Deal, ScrapeResult]]]]" = asyncio.Queue(
+            RESULT_QUEUE_SIZE
+        )
+        deals_queue: "asyncio.Queue[Optional[Deal]]" = asyncio.Queue(DEAL_QUEUE_SIZE)
+        # Changes waiting to be announced, one per deal in the order they came
+        # in; a deal that changes again before its turn keeps a single entry
+        notifications: Dict[int, Tuple[Deal, DealChange]] = {}
+        notifications_ready = asyncio.Event()
+        persist_done = False
+        new_deal_counts = defaultdict(int)
+        loop = asyncio.get_running_loop()
+        # When each deal queued for storage reached the bot, for time-to-notification
+        arrived_at: Dict[int, float] = {}
+        notification_delays: List[float] = []
+        # Stored deals found unchanged, touched after the cycle by touch_unchanged()
+        unchanged_ids: List = []
 
-            for idx, category in enumerate(categories, start=1):
-                scraper = AmazonDealsScraper(
-                    category=category,
-                    marketplace_id=marketplace_id,
-                    base_url=base_url,
-                    site_name=site_name,
-                )
-                try:
-                    await scraper.scrape()
-                except Exception as exc:  # pylint: disable=broad-exception-caught
-                    logger.exception(
-                        "Failed to scrape site '%s' category '%s': %s",
-                        site_name,
-                        category,
-                        exc,
-                    )
-                    continue
+        async def on_deal(job: ScrapeJob, deal: Deal) -> None:
+            await results_queue.put((loop.time(), deal))
 
-                logger.info(
-                    "Site '%s' category '%s' returned %d deals (%d/%d)",
-                    site_name,
-                    category,
-                    len(scraper.deals),
-                    idx,
-                    len(categories),
+        async def on_result(result: ScrapeResult) -> None:
+            await results_queue.put((loop.time(), result))
+
+        queue_settings = self.config.get("job_queue")
+        # Workers started with `python job_queue.py worker` do the scraping and
+        # report whole results; local scrapes stream their deals
+        remote = isinstance(queue_settings, dict)
+
+        async def scrape() -> None:
+            try:
+                if remote:
+                    broker = SQLiteBroker(queue_settings.get("db", DEFAULT_DB_PATH))
+                    coordinator = Coordinator(
+                        broker,
+                        max_attempts=queue_settings.get("max_attempts", DEFAULT_MAX_ATTEMPTS),
+                    )
+                    await coordinator.run_cycle(
+                        sites,
+                        timeout=queue_settings.get("timeout", DEFAULT_CYCLE_TIMEOUT),
+                        on_result=on_result,
+                    )
+                else:
+                    await run_scrape_jobs(
+                        jobs,
+                        self.browser_pool,
+                        api_client=self.api_client,
+                        global_limit=settings["global"],
+                        per_site_limit=settings["per_site"],
+                        delay_seconds=settings["delay_seconds"],
+                        on_result=on_result,
+                        on_deal=on_deal,
+                    )
+                logger.info("Scrape cycle complete: %s", reason)
+                for profile in active_profiles():
+                    logger.info("Network profile %s", profile.summary())
+            finally:
+                await results_queue.put(None)
+
+        def merge_deal(deal: Deal) -> Optional[Deal]:
+            """Fold one deal into ``collected``; returns the deal to (re)store, if any"""
+            asin = deal.asin
+            if not asin:
+                return None
+
+            # The deal's site id stands for the job's marketplace, site and base URL
+            key = (deal.site_id, asin)
+            stored = collected.get(key)
+            category_name = deal.category or "Unknown"
+
+            if stored is None:
+                # The deal is kept without copying: when a later page updates
+                # it in place, the scraper streams it again
+                deal.categories = [category_name]
+                stored = collected[key] = deal
+                changed = True
+            elif stored is deal:
+                changed = True
+            else:
+                # Prefer the latest known values for dynamic fields; a deal
+                # that is already stored goes through again only if it changed
+                changed = stored.merge(deal)
+                if category_name not in stored.categories:
+                    stored.categories.append(category_name)
+                    stored.categories.sort()
+                    changed = True
+            self.title_index.add(key, stored)
+            return stored if changed else None
+
+        def merge_result(result: ScrapeResult) -> List[Deal]:
+            """Fold a job's deals into ``collected``; returns the deals to (re)store.
+
+            Deals of local scrapes were already streamed one by one, so their
+            results are only logged.
+            """
+            job = result.job
+            if result.error is not None:
+                logger.error(
+                    "Failed to scrape site '%s' category '%s': %s",
+                    job.site_name,
+                    job.category,
+                    result.error,
+                    exc_info=result.error,
                 )
+                return []
 
-                for deal in scraper.deals:
-                    asin = deal.get("asin")
-                    if not asin or asin == "N/A":
-                        continue
+            logger.info(
+                "Site '%s' category '%s' returned %d deals",
+                job.site_name,
+                job.category,
+                len(result.deals),
+            )
+
+            if not remote:
+                return []
+            changed = (merge_deal(deal) for deal in result.deals)
+            return [deal for deal in changed if deal is not None]
 
-                    key = f"{marketplace_id}:{site_name}:{asin}"
-                    stored = collected.get(key)
-                    category_name = deal.get("category", "Unknown")
-
-                    if stored:
-                        categories_set = set(stored.get("categories", []))
-                        categories_set.add(category_name)
-                        stored["categories"] = sorted(categories_set)
-
-                        # Prefer the latest non-N/A values for dynamic fields
-                        for field, value in deal.items():
-                            if field == "categories":
-                                continue
-                            if value and value != "N/A":
-                                stored[field] = value
+        async def merge() -> None:
+            try:
+                while (item := await results_queue.get()) is not None:
+                    arrived, received = item
+                    if isinstance(received, Deal):
+                        changed = merge_deal(received)
+                        deals = [changed] if changed is not None else []
                     else:
-                        deal_copy = dict(deal)
-                        deal_copy["categories"] = [category_name]
-                        deal_copy["marketplace_id"] = marketplace_id
-                        deal_copy["site"] = site_name
-                        deal_copy["base_url"] = base_url
-                        collected[key] = deal_copy
+                        deals = merge_result(received)
+                    for deal in deals:
+                        arrived_at[id(deal)] = arrived
+                        await deals_queue.put(deal)
+            finally:
+                await deals_queue.put(None)
+
+        async def persist() -> None:
+            try:
+                finished = False
+                while not finished:
+                    # Store what queues up within a short wait, at least one deal and at most a batch
+                    deal = await deals_queue.get()
+                    deadline = loop.time() + DEAL_BATCH_WAIT_SECONDS
+                    batch: Dict[int, Deal] = {}
+                    while deal is not None:
+                        batch[id(deal)] = deal
+                        if len(batch) >= DEAL_BATCH_SIZE:
+                            break
+                        if not deals_queue.empty():
+                            deal = deals_queue.get_nowait()
+                            continue
+                        remaining = deadline - loop.time()
+                        if remaining <= 0:
+                            break
+                        try:
+                            deal = await asyncio.wait_for(deals_queue.get(), remaining)
+                        except asyncio.TimeoutError:
+                            break
+                    finished = deal is None
+                    if not batch:
+                        continue
+
+                    stored = await self.process_deals(list(batch.values()), unchanged_ids=unchanged_ids)
+                    for deal, change, is_new in stored:
+                        if is_new:
+                            new_deal_counts[deal.get("site", "Unknown Site")] += 1
+                        if change:
+                            queue_notification(deal, change)
+            finally:
+                nonlocal persist_done
+                persist_done = True
+                notifications_ready.set()
+
+        def queue_notification(deal: Deal, change: DealChange) -> None:
+            pending = notifications.get(id(deal))
+            if pending is not None and pending[1].change_type == "New deal":
+                # Still new to the channel, which will show its latest values
+                return
+            if pending is not None:
+                # From the value announced last to the latest one
+                fields = dict(pending[1].changed_fields)
+                for field, (old_value, new_value) in change.changed_fields.items():
+                    fields[field] = (fields[field][0] if field in fields else old_value, new_value)
+                fields = {field: values for field, values in fields.items() if values[0] != values[1]}
+                if not fields:
+                    del notifications[id(deal)]
+                    return
+                change = DealChange(change.change_type, fields)
+            notifications[id(deal)] = (deal, change)
+            notifications_ready.set()
+
+        async def notify() -> None:
+            while True:
+                if not notifications:
+                    if persist_done:
+                        break
+                    notifications_ready.clear()
+                    await notifications_ready.wait()
+                    continue
+                deal, change = notifications.pop(next(iter(notifications)))
+                try:
+                    await self.notify_change(deal, change)
+                except Exception as exc:  # pylint: disable=broad-exception-caught
+                    logger.exception("Failed to notify change of deal %s: %s", deal.get("asin"), exc)
+                    continue
+                started = arrived_at.get(id(deal))
+                if started is not None:
+                    notification_delays.append(loop.time() - started)
+
+        stages = [
+            asyncio.create_task(stage())
+            for stage in (scrape, merge, persist, notify)
+        ]
+        try:
+            await asyncio.gather(*stages)
+        except BaseException:
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            raise
 
-                await asyncio.sleep(2)
+        await self.touch_unchanged(unchanged_ids)
 
-        logger.info("Scrape cycle complete: %s", reason)
+        # Deals that dropped out of this cycle are no longer searchable
+        self.title_index.retain(collected)
 
         if not collected:
             logger.info("No deals collected during scrape cycle")
             return
 
-        logger.info("Processing %d unique deals after scraping", len(collected))
-
-        notifications: List[Tuple[Dict, DealChange]] = []
-        new_deal_counts = defaultdict(int)
-
-        for deal in collected.values():
-            try:
-                change, is_new = await self.process_deal(deal)
-            except Exception as exc:  # pylint: disable=broad-exception-caught
-                logger.exception("Failed to process deal %s: %s", deal.get("asin"), exc)
-                continue
-
-            if is_new:
-                site_name = deal.get("site", "Unknown Site")
-                new_deal_counts[site_name] += 1
-
-            if change:
-                notifications.append((deal, change))
-
+        logger.info("Processed %d unique deals", len(collected))
         if new_deal_counts:
             for site_name, count in new_deal_counts.items():
                 logger.info("New deals detected for %s: %d", site_name, count)
         else:
             logger.info("No new deals detected across configured sites")
 
-        if not notifications:
+        if not notification_delays:
             logger.info("No deal changes detected after processing")
             return
 
-        logger.info("Deals after processing: %d price updates queued", len(notifications))
-
-        for deal, change in notifications:
-            await self.notify_change(deal, change)
-
-    async def process_deal(self, deal: Dict) -> Tuple[Optional[DealChange], bool]:
-        marketplace_id = deal.get("marketplace_id")
-        site_name = deal.get("site")
-
-        query: Dict[str, str] = {"asin": deal["asin"]}
-        if marketplace_id:
-            query["marketplace_id"] = marketplace_id
-        if site_name:
-            query["site"] = site_name
-
-        existing = await self.deals.find_one(query)
+        notification_delays.sort()
+        logger.info(
+            "Sent %d deal notifications, %.1fs median / %.1fs max after the deal reached the bot",
+            len(notification_delays),
+            notification_delays[len(notification_delays) // 2],
+            notification_delays[-1],
+        )
 
+    async def process_deals(
+        self, deals: List[Deal], *, unchanged_ids: Optional[List] = None
+    ) -> List[Tuple[Deal, Optional[DealChange], bool]]:
+        """Store a cycle's deals and return (deal, change, is_new) for each one stored.
+
+        Deals are handled in batches of DEAL_BATCH_SIZE: one query fetches the
+        stored documents of the whole batch, and the inserts and updates go
+        out in one unordered bulk_write. Updates only $set the fields that
+        differ from the stored document; deals with no differences are
+        touched with update_many calls of ``last_seen`` at the end,
+        or, when an ``unchanged_ids`` list is passed, have their ids added to
+        it for the caller to touch later with touch_unchanged().
+        A failed batch or write is logged and its deals left out of the results.
+        """
         now = datetime.now(timezone.utc)
-        categories = set(existing.get("categories", [])) if existing else set()
-
-        direct_category = deal.get("category")
-        if direct_category:
-            categories.add(direct_category)
-
-        extra_categories = deal.get("categories", [])
-        if isinstance(extra_categories, list):
-            categories.update(extra_categories)
-
-        document = {**deal, "categories": sorted(categories), "last_seen": now}
-
-        if not existing:
-            document["first_seen"] = now
-            await self.deals.insert_one(document)
-            logger.debug(
-                "Inserted new deal %s (%s)", deal.get("asin"), deal.get("marketplace_id")
-            )
-            return DealChange("New deal", {}), True
-
-        fields_to_watch: List[str] = ["current_price"]
-        changed: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
-
-        for field in fields_to_watch:
-            old_value = existing.get(field)
-            new_value = deal.get(field)
-            if old_value != new_value:
-                changed[field] = (old_value, new_value)
+        results: List[Tuple[Deal, Optional[DealChange], bool]] = []
+        touch_now = unchanged_ids is None
+        if touch_now:
+            unchanged_ids = []
+        unchanged_before = len(unchanged_ids)
+        for start in range(0, len(deals), DEAL_BATCH_SIZE):
+            batch = deals[start:start + DEAL_BATCH_SIZE]
+            try:
+                results.extend(await self._process_batch(batch, now, unchanged_ids))
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                logger.exception(
+                    "Failed to process %d deals starting at %s: %s",
+                    len(batch),
+                    batch[0].get("asin"),
+                    exc,
+                )
 
-        update_doc = {
-            "$set": document,
-        }
-        await self.deals.update_one({"_id": existing["_id"]}, update_doc)
+        unchanged = len(unchanged_ids) - unchanged_before
+        if touch_now:
+            await self.touch_unchanged(unchanged_ids, now)
+
+        new = sum(1 for *_, is_new in results if is_new)
+        logger.debug(
+            "Stored %d deals: %d new, %d updated, %d unchanged",
+            len(results),
+            new,
+            len(results) - unchanged - new,
+            unchanged,
+        )
+        return results
 
-        if changed:
-            return DealChange("Updated deal", changed), False
+    async def touch_unchanged(self, unchanged_ids: List, now: Optional[datetime] = None) -> None:
+        """Set ``last_seen`` of the stored deals in ``unchanged_ids``.
 
-        return None, False
+        One update_many per DEAL_BATCH_SIZE ids keeps each $in filter well
+        below MongoDB's document size limit.
+        """
+        now = now or datetime.now(timezone.utc)
+        for start in range(0, len(unchanged_ids), DEAL_BATCH_SIZE):
+            chunk = unchanged_ids[start:start + DEAL_BATCH_SIZE]
+            try:
+                await self.deals.update_many({"_id": {"$in": chunk}}, {"$set": {"last_seen": now}})
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                logger.exception("Failed to touch %d unchanged deals: %s", len(chunk), exc)
+
+    async def _process_batch(
+        self, deals: List[Deal], now: datetime, unchanged_ids: List
+    ) -> List[Tuple[Deal, Optional[DealChange], bool]]:
+        cache = self.state_cache
+        results: List[Tuple[Deal, Optional[DealChange], bool]] = []
+        # Deals whose stored document has to be read: unknown to the cache or changed
+        pending: List[Deal] = []
+        for deal in deals:
+            state = None
+            if cache is not None:
+                state = cache.get(deal_key(deal.get("marketplace_id"), deal.get("site"), deal["asin"]))
+            if state is not None and fingerprint(_deal_document(deal, state.categories)) == state.fingerprint:
+                unchanged_ids.append(state.document_id)
+                results.append((deal, None, False))
+            else:
+                pending.append(deal)
+        if not pending:
+            return results
+
+        asins = sorted({deal["asin"] for deal in pending})
+        stored: Dict[str, List[Dict]] = defaultdict(list)
+        async for document in self.deals.find({"asin": {"$in": asins}}):
+            stored[document.get("asin")].append(document)
+
+        operations = []
+        # Index in results and stored document of the deal each operation writes
+        written: List[Tuple[int, Dict]] = []
+        for deal in pending:
+            existing = _matching_document(deal, stored.get(deal["asin"], ()))
+            operation, change, document = _deal_write(deal, existing, now)
+            if operation is None:
+                unchanged_ids.append(existing["_id"])
+                if cache is not None:
+                    cache.put(document)
+            else:
+                operations.append(operation)
+                written.append((len(results), document))
+            results.append((deal, change, existing is None))
 
-    async def notify_change(self, deal: Dict, change: DealChange) -> None:
+        if not operations:
+            return results
+        failed = set()
+        try:
+            await self.deals.bulk_write(operations, ordered=False)
+        except BulkWriteError as exc:
+            # Unordered writes carry on past a failure; drop only the failed deals
+            failed = {written[error["index"]][0] for error in exc.details.get("writeErrors", [])}
+            logger.error("Failed to store %d of %d deals: %s", len(failed), len(deals), exc)
+            results = [result for index, result in enumerate(results) if index not in failed]
+
+        if cache is not None:
+            for index, document in written:
+                if index in failed:
+                    cache.discard(deal_key(document.get("marketplace_id"), document.get("site"), document.get("asin")))
+                elif "_id" in document:
+                    # Inserted documents got their _id from the driver
+                    cache.put(document)
+        return results
+
+    async def notify_change(self, deal: Deal, change: DealChange) -> None:
         if not self.deals_channel:
             logger.warning("Deals channel not ready; dropping notification")
             return
@@ -447,6 +793,85 @@ class DealMonitorBot(commands.Bot):
         await asyncio.sleep(0.5)
 
 
+def _matching_document(deal: Deal, documents) -> Optional[Dict]:
+    """Return the stored document of ``deal`` among documents with its ASIN"""
+    marketplace_id = deal.get("marketplace_id")
+    site_name = deal.get("site")
+    for document in documents:
+        if marketplace_id and document.get("marketplace_id") != marketplace_id:
+            continue
+        if site_name and document.get("site") != site_name:
+            continue
+        return document
+    return None
+
+
+def _deal_document(deal: Deal, stored_categories) -> Dict:
+    """Return the document of ``deal``, its categories combined with ``stored_categories``"""
+    categories = set(stored_categories)
+
+    direct_category = deal.get("category")
+    if direct_category:
+        categories.add(direct_category)
+
+    extra_categories = deal.get("categories", [])
+    if isinstance(extra_categories, list):
+        categories.update(extra_categories)
+
+    document = deal.to_dict()
+    document["categories"] = sorted(categories)
+    return document
+
+
+def _deal_write(deal: Deal, existing: Optional[Dict], now: datetime):
+    """Return the write that stores ``deal`` over ``existing``, the change to notify and the deal's document.
+
+    The write is None when the stored document already holds every value.
+    """
+    document = _deal_document(deal, existing.get("categories", []) if existing else ())
+
+    if not existing:
+        document["first_seen"] = now
+        document["last_seen"] = now
+        return InsertOne(document), DealChange("New deal", {}), document
+
+    changed: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+
+    # Compare prices in cents; documents stored before Deal only have the display string
+    old_cents = existing.get("price_cents")
+    if old_cents is None:
+        old_cents, _ = parse_price(existing.get("current_price"))
+    if old_cents != deal.price_cents:
+        changed["current_price"] = (existing.get("current_price"), deal.current_price)
+
+    change = DealChange("Updated deal", changed) if changed else None
+    updates = {
+        field: value
+        for field, value in document.items()
+        if field not in existing or existing[field] != value
+    }
+    document["_id"] = existing["_id"]
+    if not updates:
+        return None, change, document
+    updates["last_seen"] = now
+    return UpdateOne({"_id": existing["_id"]}, {"$set": updates}), change, document
+
+
+@commands.command(name="search")
+async def search_command(ctx: commands.Context, *, query: str) -> None:
+    """Find deals by title words, e.g. `!search nintendo switch` or `!search lego OR playmobil`"""
+    results = ctx.bot.title_index.search(query, limit=SEARCH_RESULT_LIMIT)
+    if not results:
+        await ctx.send(f"No deals found for `{query}`")
+        return
+
+    lines = [
+        f"**{deal.discount}** {deal.current_price} — [{deal['title'][:80]}]({deal.product_url})"
+        for deal in results
+    ]
+    await ctx.send("\n".join(lines), suppress_embeds=True)
+
+
 def run_bot() -> None:
     logging.basicConfig(level=logging.INFO)
     token, channel_id, mongo_uri, mongo_db = ensure_env_vars()
@@ -0,0 +1,288 @@
+import argparse
+import asyncio
+import html
+import json
+import random
+import time
+import zlib
+
+from aiohttp import web
+
+from scraper import AmazonDealsScraper
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MARKETPLACE_ID = "FAKEMARKET01"
+
+DEAL_BADGES = ["Limited time deal", "Lightning Deal", "Prime Exclusive Deal", "Deal"]
+TITLE_WORDS = [
+    "Wireless", "Gaming", "Mouse", "Keyboard", "Headset", "Controller", "Ultra", "Pro",
+    "Charger", "Cable", "Speaker", "Bluetooth", "Portable", "Smart", "LED", "Camera",
+    "Backpack", "Kitchen", "Blender", "Coffee", "Stainless", "Steel", "Pack", "Café",
+]
+
+PAGE_TEMPLATE = """<!doctype html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Today's Deals</title>
+<style>
+  nav button { margin: 2px; }
+  .card { height: 24px; overflow: hidden; border-bottom: 1px solid #ddd; }
+</style>
+</head>
+<body>
+<nav>__BUTTONS__</nav>
+<div id="grid"></div>
+<button id="more" data-testid="load-more-view-more-button" style="display:none">View more deals</button>
+<script>
+const API = __API__;
+const PAGE_SIZE = __PAGE_SIZE__;
+const SHOW_MORE_BUTTON = __SHOW_MORE__;
+const grid = document.getElementById("grid");
+const more = document.getElementById("more");
+let category = "", next = 0, hasMore = true, loading = false, generation = 0;
+
+async function load(reset) {
+  if (reset) {
+    generation++;
+    next = 0; hasMore = true; loading = false;
+    grid.replaceChildren();
+  }
+  if (loading || !hasMore) return;
+  loading = true;
+  const mine = generation;
+  try {
+    const response = await fetch(API, {
+      method: "POST",
+      headers: {"Content-Type": "application/json"},
+      body: JSON.stringify({category: category, startIndex: next, pageSize: PAGE_SIZE}),
+    });
+    const data = await response.json();
+    if (mine !== generation) return;
+    const promotions = data.entity.rankedPromotions;
+    next += promotions.length;
+    hasMore = data.entity.hasMore;
+    const cards = document.createDocumentFragment();
+    for (const promo of promotions) {
+      const card = document.createElement("div");
+      card.className = "card";
+      card.textContent = promo.product.entity.title.entity.displayString;
+      cards.append(card);
+    }
+    grid.append(cards);
+    more.style.display = SHOW_MORE_BUTTON && hasMore ? "" : "none";
+  } finally {
+    if (mine === generation) loading = false;
+  }
+}
+
+document.querySelectorAll("nav button").forEach(button => button.addEventListener("click", () => {
+  category = button.textContent;
+  load(true);
+}));
+more.addEventListener("click", () => load(false));
+window.addEventListener("scroll", () => {
+  if (window.innerHeight + window.scrollY >= document.body.scrollHeight - window.innerHeight) load(false);
+});
+load(true);
+</script>
+</body>
+</html>
+"""
+
+
+class FakeDealsServer:
+    """Local stand-in for an Amazon deals page and its promotions API.
+
+    The page has a button per category, a "View more deals" button and
+    infinite scroll, and fetches ``/api/marketplaces/{id}/promotions`` the way
+    the real one does. Every category has ``deals_per_category`` generated
+    deals, served ``page_size`` at a time after ``latency`` seconds. Deals are
+    derived from ``seed``, so every run sees the same ASINs; with ``churn``
+    that fraction of the prices changes every ``churn_period`` seconds, to
+    exercise change notifications in the bot.
+
+    Point a site's ``base_url`` at ``server.url`` to scrape it.
+    """
+
+    def __init__(self, deals_per_category=1000, page_size=30, latency=0.0, categories=None,
+                 show_more_button=True, seed=0, churn=0.0, churn_period=60,
+                 marketplace_id=DEFAULT_MARKETPLACE_ID):
+        self.deals_per_category = deals_per_category
+        self.page_size = page_size
+        self.latency = latency
+        self.categories = list(categories or AmazonDealsScraper.CATEGORIES)
+        self.show_more_button = show_more_button
+        self.seed = seed
+        self.churn = churn
+        self.churn_period = churn_period
+        self.marketplace_id = marketplace_id
+        self.requests_served = 0
+        self.promotions_served = 0
+
+        self.host = None
+        self.port = None
+        self._runner = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/deals"
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    def build_app(self):
+        app = web.Application()
+        app.router.add_post("/api/marketplaces/{marketplace_id}/promotions", self._handle_promotions)
+        app.router.add_get("/{path:.*}", self._handle_page)
+        return app
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Start serving; ``port=0`` picks a free port"""
+        self._runner = web.AppRunner(self.build_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.host = host
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_page(self, request):
+        buttons = "".join(f"<button>{html.escape(category)}</button>" for category in self.categories)
+        page = (PAGE_TEMPLATE
+                .replace("__BUTTONS__", buttons)
+                .replace("__API__", json.dumps(f"/api/marketplaces/{self.marketplace_id}/promotions"))
+                .replace("__PAGE_SIZE__", str(self.page_size))
+                .replace("__SHOW_MORE__", "true" if self.show_more_button else "false"))
+        return web.Response(text=page, content_type="text/html")
+
+    async def _handle_promotions(self, request):
+        try:
+            body = await request.json()
+        except ValueError:
+            body = {}
+        category = body.get("category") or ""
+        start = max(0, int(body.get("startIndex") or 0))
+        size = max(1, int(body.get("pageSize") or self.page_size))
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        end = min(start + size, self.deals_per_category)
+        promotions = [self.promotion(category, index) for index in range(start, end)]
+        self.requests_served += 1
+        self.promotions_served += len(promotions)
+        return web.json_response({
+            "entity": {
+                "rankedPromotions": promotions,
+                "hasMore": end < self.deals_per_category,
+            }
+        })
+
+    def _epoch(self):
+        return int(time.time() // self.churn_period) if self.churn else 0
+
+    def promotion(self, category, index):
+        """Return the generated promotion at ``index`` of ``category``, in the API's shape"""
+        key = zlib.crc32(f"{self.seed}:{category}:{index}".encode("utf-8"))
+        rng = random.Random(key)
+        asin = "B0" + "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789") for _ in range(8))
+        title = " ".join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(3, 8)))
+        original_cents = rng.randint(500, 50000)
+        discount = rng.randint(5, 70)
+
+        epoch = self._epoch()
+        if epoch and rng.random() < self.churn:
+            discount = random.Random(key ^ epoch).randint(5, 70)
+        price_cents = original_cents * (100 - discount) // 100
+
+        def money(cents):
+            return {"moneyValueOrRange": {"value": {"amount": f"{cents / 100:.2f}", "currencyCode": "EUR"}}}
+
+        return {
+            "brandId": f"brand-{rng.randint(1, 500)}",
+            "product": {
+                "entity": {
+                    "asin": asin,
+                    "title": {"entity": {"displayString": f"{title} {index}"}},
+                    "buyingOptions": [{
+                        "price": {
+                            "entity": {
+                                "priceToPay": money(price_cents),
+                                "basisPrice": money(original_cents),
+                                "savings": {"percentage": {"value": discount}},
+                            }
+                        },
+                        "dealBadge": {
+                            "entity": {
+                                "label": {"content": {"fragments": [{"text": rng.choice(DEAL_BADGES)}]}}
+                            }
+                        },
+                    }],
+                    "productImages": {
+                        "entity": {"images": [{"lowRes": {"physicalId": f"{asin}L"}}]}
+                    },
+                }
+            },
+        }
+
+
+async def serve(server, host, port):
+    await server.start(host, port)
+    site = {
+        "name": "Fake Amazon",
+        "base_url": server.url,
+        "marketplace_id": server.marketplace_id,
+        "categories": server.categories[:1],
+        "scrape_all": False,
+    }
+    print(f"🧪 Fake deals server on {server.url}: {server.deals_per_category} deals per category, "
+          f"{server.page_size} per page, {server.latency}s latency")
+    print(f"   Site entry for config.json:\n{json.dumps(site, indent=2, ensure_ascii=False)}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Amazon deals page for load testing")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--deals", type=int, default=1000, help="deals per category")
+    parser.add_argument("--page-size", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per promotions response")
+    parser.add_argument("--no-button", action="store_true", help="infinite scroll only")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--churn", type=float, default=0.0, help="fraction of prices changing per period")
+    parser.add_argument("--churn-period", type=float, default=60)
+    args = parser.parse_args()
+
+    server = FakeDealsServer(
+        deals_per_category=args.deals,
+        page_size=args.page_size,
+        latency=args.latency,
+        show_more_button=not args.no_button,
+        seed=args.seed,
+        churn=args.churn,
+        churn_period=args.churn_period,
+    )
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,471 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from browser_pool import BrowserPool
+from deal import Deal
+from promotions_api import PromotionsApiClient
+from scrape_runner import ScrapeJob, ScrapeResult, build_scrape_jobs, run_scrape_jobs
+
+
+DEFAULT_DB_PATH = "scrape_jobs.sqlite3"
+DEFAULT_LEASE_SECONDS = 900
+DEFAULT_MAX_ATTEMPTS = 3
+# How long the Discord bot waits for the workers of one hourly cycle
+DEFAULT_CYCLE_TIMEOUT = 45 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    cycle_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_token TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_cycle ON jobs (cycle_id, status);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS results (
+    job_id TEXT PRIMARY KEY,
+    cycle_id TEXT NOT NULL,
+    deals TEXT NOT NULL,
+    error TEXT,
+    worker TEXT,
+    submitted_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_cycle ON results (cycle_id, submitted_at);
+"""
+
+
+class SQLiteBroker:
+    """Job broker backed by one SQLite file, shared by a coordinator and workers.
+
+    Jobs move from ``pending`` to ``leased`` when a worker takes them. A lease
+    that is not renewed before it expires makes the job available again, until
+    ``max_attempts`` is used up and the job is ``failed``. Submitting a result
+    is idempotent: the first successful result for a job wins and marks it
+    ``done``, even from a worker whose lease expired meanwhile, since its deals
+    are just as good; later results are ignored. A failure only counts when it
+    comes from the current lease holder.
+    All workers must see the same file, so this broker covers one machine.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    async def _run(self, fn, *args):
+        return await asyncio.to_thread(fn, *args)
+
+    # -- coordinator side -------------------------------------------------
+
+    def _enqueue(self, cycle_id, jobs, max_attempts):
+        now = time.time()
+        rows = [
+            (
+                f"{cycle_id}:{job.site_name}:{job.category}",
+                cycle_id,
+                json.dumps(asdict(job), ensure_ascii=False),
+                max_attempts,
+                now,
+                now,
+            )
+            for job in jobs
+        ]
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (job_id, cycle_id, payload, max_attempts, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+        return [row[0] for row in rows]
+
+    async def enqueue(self, cycle_id: str, jobs: List[ScrapeJob], max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> List[str]:
+        """Add a cycle's jobs; enqueueing the same cycle twice is a no-op"""
+        return await self._run(self._enqueue, cycle_id, jobs, max_attempts)
+
+    def _cycle_status(self, cycle_id):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._expire_leases(conn)
+            conn.execute("COMMIT")
+            rows = conn.execute(
+                "SELECT status, COUNT(*) AS n FROM jobs WHERE cycle_id = ? GROUP BY status",
+                (cycle_id,),
+            ).fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    async def cycle_status(self, cycle_id: str) -> Dict[str, int]:
+        return await self._run(self._cycle_status, cycle_id)
+
+    def _abandon_cycle(self, cycle_id, reason):
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'failed', lease_token = NULL, last_error = ?, updated_at = ? "
+                "WHERE cycle_id = ? AND status IN ('pending', 'leased')",
+                (reason, now, cycle_id),
+            )
+        return cursor.rowcount
+
+    async def abandon_cycle(self, cycle_id: str, reason: str = "cycle timed out") -> int:
+        """Fail the jobs of ``cycle_id`` still pending or leased; returns how many.
+
+        Workers then skip them, and results still in flight are ignored.
+        """
+        return await self._run(self._abandon_cycle, cycle_id, reason)
+
+    def _results_since(self, cycle_id, after):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT r.rowid, r.job_id, r.deals, r.error, j.payload FROM results r "
+                "JOIN jobs j ON j.job_id = r.job_id WHERE r.cycle_id = ? AND r.rowid > ? ORDER BY r.rowid",
+                (cycle_id, after),
+            ).fetchall()
+        results = [
+            (
+                row["job_id"],
+                ScrapeJob(**json.loads(row["payload"])),
+                [Deal.from_dict(deal) for deal in json.loads(row["deals"])],
+                row["error"],
+            )
+            for row in rows
+        ]
+        return results, rows[-1]["rowid"] if rows else after
+
+    async def results_since(self, cycle_id: str, after: int = 0):
+        """Return ([(job_id, job, deals, error)], last_rowid) for results stored after row ``after``.
+
+        Result rows are only ever appended, so passing back the returned row
+        id reads each result once.
+        """
+        return await self._run(self._results_since, cycle_id, after)
+
+    # -- worker side ------------------------------------------------------
+
+    def _expire_leases(self, conn):
+        now = time.time()
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', updated_at = ?, "
+            "last_error = COALESCE(last_error, 'lease expired') "
+            "WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+            (now, now),
+        )
+        conn.execute(
+            "UPDATE jobs SET status = 'pending', lease_owner = NULL, lease_token = NULL, updated_at = ? "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (now, now),
+        )
+
+    def _lease(self, worker_id, lease_seconds):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._expire_leases(conn)
+            row = conn.execute(
+                "SELECT job_id, payload FROM jobs WHERE status = 'pending' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            token = uuid.uuid4().hex
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_owner = ?, "
+                "lease_token = ?, lease_expires = ?, updated_at = ? WHERE job_id = ?",
+                (worker_id, token, now + lease_seconds, now, row["job_id"]),
+            )
+            conn.execute("COMMIT")
+        return row["job_id"], token, ScrapeJob(**json.loads(row["payload"]))
+
+    async def lease(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        """Take the oldest available job; returns (job_id, lease_token, job) or None"""
+        return await self._run(self._lease, worker_id, lease_seconds)
+
+    def _renew(self, job_id, token, lease_seconds):
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                "WHERE job_id = ? AND lease_token = ? AND status = 'leased'",
+                (now + lease_seconds, now, job_id, token),
+            )
+        return cursor.rowcount == 1
+
+    async def renew(self, job_id: str, token: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """Extend a lease; returns False if the lease was lost"""
+        return await self._run(self._renew, job_id, token, lease_seconds)
+
+    def _submit(self, job_id, token, worker_id, deals, error):
+        now = time.time()
+        deals_json = json.dumps(
+            [deal.to_dict() if isinstance(deal, Deal) else deal for deal in deals], ensure_ascii=False
+        )
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            job = conn.execute(
+                "SELECT cycle_id, status, attempts, max_attempts, lease_token FROM jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+            if job is None or job["status"] in ("done", "failed"):
+                conn.execute("COMMIT")
+                return False
+
+            if error is None:
+                conn.execute(
+                    "INSERT OR IGNORE INTO results (job_id, cycle_id, deals, error, worker, submitted_at) "
+                    "VALUES (?, ?, ?, NULL, ?, ?)",
+                    (job_id, job["cycle_id"], deals_json, worker_id, now),
+                )
+                conn.execute(
+                    "UPDATE jobs SET status = 'done', lease_token = NULL, updated_at = ? WHERE job_id = ?",
+                    (now, job_id),
+                )
+                conn.execute("COMMIT")
+                return True
+
+            # A failure only counts when it comes from the current lease holder
+            if job["lease_token"] != token:
+                conn.execute("COMMIT")
+                return False
+
+            if job["attempts"] < job["max_attempts"]:
+                conn.execute(
+                    "UPDATE jobs SET status = 'pending', lease_owner = NULL, lease_token = NULL, "
+                    "last_error = ?, updated_at = ? WHERE job_id = ?",
+                    (error, now, job_id),
+                )
+            else:
+                conn.execute(
+                    "INSERT OR IGNORE INTO results (job_id, cycle_id, deals, error, worker, submitted_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, job["cycle_id"], deals_json, error, worker_id, now),
+                )
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', lease_token = NULL, last_error = ?, updated_at = ? "
+                    "WHERE job_id = ?",
+                    (error, now, job_id),
+                )
+            conn.execute("COMMIT")
+        return True
+
+    async def submit(self, job_id: str, token: str, worker_id: str, deals: List[Deal], error: Optional[str] = None) -> bool:
+        """Record a job's outcome; returns False if it was ignored as a duplicate or stale"""
+        return await self._run(self._submit, job_id, token, worker_id, deals, error)
+
+
+class Coordinator:
+    """Enqueues a cycle of (site, category) jobs and collects the workers' results"""
+
+    def __init__(self, broker: SQLiteBroker, *, max_attempts: int = DEFAULT_MAX_ATTEMPTS, poll_interval: float = 2.0):
+        self.broker = broker
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+
+    async def run_cycle(
+        self,
+        sites: List[Dict],
+        *,
+        cycle_id: Optional[str] = None,
+        timeout: Optional[float] = None,
+        on_result: Optional[Callable[[ScrapeResult], Awaitable[None]]] = None,
+    ) -> List[ScrapeResult]:
+        """Enqueue one job per category and wait until every job is done or failed.
+
+        ``on_result`` is awaited for each job as its result arrives. A job that
+        fails all its attempts without a worker reporting back (e.g. workers
+        keep dying) is reported with an error. When ``timeout`` runs out, the
+        jobs still open are failed so workers move on to newer cycles, and are
+        reported with an error too. Passing the ``cycle_id`` of an interrupted
+        cycle resumes it.
+        """
+        cycle_id = cycle_id or time.strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:6]
+        jobs = build_scrape_jobs(sites)
+        job_ids = await self.broker.enqueue(cycle_id, jobs, self.max_attempts)
+        jobs_by_id = dict(zip(job_ids, jobs))
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        seen = set()
+        last_rowid = 0
+        results: List[ScrapeResult] = []
+
+        async def deliver(result: ScrapeResult) -> None:
+            results.append(result)
+            if on_result is not None:
+                await on_result(result)
+
+        while True:
+            # Status before results, so a job that closes in between still has its result read
+            status = await self.broker.cycle_status(cycle_id)
+            open_jobs = status.get("pending", 0) + status.get("leased", 0)
+
+            new_results, last_rowid = await self.broker.results_since(cycle_id, last_rowid)
+            for job_id, job, deals, error in new_results:
+                seen.add(job_id)
+                await deliver(ScrapeResult(job, None, deals, RuntimeError(error) if error else None))
+
+            if open_jobs == 0:
+                break
+            if deadline is not None and loop.time() > deadline:
+                # Nobody waits for the rest; close it, then collect what came in meanwhile
+                await self.broker.abandon_cycle(cycle_id)
+                deadline = None
+                continue
+            await asyncio.sleep(self.poll_interval)
+
+        # Jobs that never produced a result row: lost to lease expiry or the timeout
+        for job_id, job in jobs_by_id.items():
+            if job_id not in seen:
+                await deliver(ScrapeResult(job, None, [], RuntimeError("no result from any worker")))
+
+        return results
+
+
+class Worker:
+    """Leases jobs from the broker, scrapes them and submits the deals back"""
+
+    def __init__(
+        self,
+        broker: SQLiteBroker,
+        *,
+        worker_id: Optional[str] = None,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        poll_interval: float = 2.0,
+    ):
+        self.broker = broker
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+
+    async def _keep_lease(self, job_id: str, token: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not await self.broker.renew(job_id, token, self.lease_seconds):
+                print(f"⚠️  [{self.worker_id}] Lost lease on {job_id}")
+                return
+
+    async def run(self, *, stop_when_idle: bool = False) -> int:
+        """Process jobs until stopped (or until the queue is empty); returns jobs handled"""
+        handled = 0
+        async with BrowserPool() as pool, PromotionsApiClient() as api_client:
+            while True:
+                leased = await self.broker.lease(self.worker_id, self.lease_seconds)
+                if leased is None:
+                    if stop_when_idle:
+                        return handled
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+
+                job_id, token, job = leased
+                print(f"🔧 [{self.worker_id}] Scraping {job.category} at {job.site_name}")
+                keeper = asyncio.create_task(self._keep_lease(job_id, token))
+                try:
+                    (result,) = await run_scrape_jobs([job], pool, api_client=api_client)
+                finally:
+                    keeper.cancel()
+                    await asyncio.gather(keeper, return_exceptions=True)
+
+                error = f"{type(result.error).__name__}: {result.error}" if result.error else None
+                accepted = await self.broker.submit(job_id, token, self.worker_id, result.deals, error)
+                status = "submitted" if accepted else "ignored (already done or lease lost)"
+                print(f"📤 [{self.worker_id}] {len(result.deals)} deals for {job.category} at {job.site_name} {status}")
+                handled += 1
+
+
+def _load_sites(config_path):
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    return config.get("sites", [])
+
+
+async def _coordinate(args):
+    broker = SQLiteBroker(args.db)
+    coordinator = Coordinator(broker, max_attempts=args.max_attempts)
+
+    cycle_id = args.cycle_id
+    while True:
+        sites = _load_sites(args.config)
+        total = 0
+
+        async def report(result: ScrapeResult) -> None:
+            nonlocal total
+            job = result.job
+            if result.error is not None:
+                print(f"❌ {job.category} at {job.site_name}: {result.error}")
+            else:
+                total += len(result.deals)
+                print(f"✅ {len(result.deals)} deals from {job.category} at {job.site_name}")
+
+        await coordinator.run_cycle(sites, cycle_id=cycle_id, timeout=args.timeout, on_result=report)
+        print(f"\n✅ Cycle complete: {total} deals")
+
+        if not args.interval:
+            return
+        await asyncio.sleep(args.interval)
+        # --cycle-id only names the first cycle; reusing it would make every
+        # later enqueue a no-op that hands back the first cycle's results
+        if args.cycle_id:
+            cycle_id = f"{args.cycle_id}-{time.strftime('%Y%m%dT%H%M%S')}"
+
+
+async def _work(args):
+    broker = SQLiteBroker(args.db)
+    worker = Worker(broker, worker_id=args.worker_id, lease_seconds=args.lease_seconds)
+    handled = await worker.run(stop_when_idle=args.once)
+    print(f"✓ Worker finished after {handled} jobs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed Amazon deals scraping")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite broker file shared by all processes")
+    subparsers = parser.add_subparsers(dest="role", required=True)
+
+    coordinator = subparsers.add_parser("coordinator", help="enqueue a scrape cycle and collect results")
+    coordinator.add_argument("--config", default="config.json")
+    coordinator.add_argument("--cycle-id", help="resume an interrupted cycle")
+    coordinator.add_argument("--timeout", type=float, help="give up on a cycle after this many seconds")
+    coordinator.add_argument("--interval", type=float, help="repeat the cycle every N seconds")
+    coordinator.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+
+    worker = subparsers.add_parser("worker", help="scrape jobs from the queue")
+    worker.add_argument("--worker-id")
+    worker.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS)
+    worker.add_argument("--once", action="store_true", help="exit when the queue is empty")
+
+    args = parser.parse_args()
+    asyncio.run(_coordinate(args) if args.role == "coordinator" else _work(args))
+
+
+if __name__ == "__main__":
+    main()
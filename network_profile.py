@@ -0,0 +1,175 @@
+import re
+from collections import Counter
+from urllib.parse import urlsplit
+
+
+# Built-in profiles. "lean" keeps everything the deals widget needs to render
+# and page (documents, scripts, stylesheets, XHR/fetch) and drops the rest.
+BUILTIN_PROFILES = {
+    "off": {
+        "block_resource_types": [],
+        "block_domains": [],
+        "allow_url_patterns": [],
+    },
+    "lean": {
+        "block_resource_types": ["image", "media", "font", "ping", "beacon"],
+        "block_domains": [
+            "fls-eu.amazon",
+            "fls-na.amazon",
+            "unagi.amazon",
+            "unagi-na.amazon",
+            "aax-eu.amazon",
+            "aax.amazon-adsystem.com",
+            "amazon-adsystem.com",
+            "device-metrics-us.amazon.com",
+            "device-metrics-us-2.amazon.com",
+            "google-analytics.com",
+            "googletagmanager.com",
+            "doubleclick.net",
+        ],
+        "allow_url_patterns": [r"/api/marketplaces/[^/]+/promotions"],
+    },
+    "strict": {
+        "extends": "lean",
+        "block_resource_types": ["stylesheet", "texttrack", "manifest", "websocket"],
+    },
+}
+
+
+class NetworkProfile:
+    """``page.route`` based request blocking with byte and request counters.
+
+    A request is aborted when its resource type or host is blocked, unless its
+    URL matches one of the allow patterns. Counters are kept per profile, so
+    every page that shares a profile adds to the same totals. Note that
+    Playwright bypasses the HTTP cache for routed pages.
+    """
+
+    def __init__(self, name, block_resource_types=(), block_domains=(), allow_url_patterns=()):
+        self.name = name
+        self.block_resource_types = frozenset(block_resource_types)
+        self.block_domains = tuple(domain.lower() for domain in block_domains)
+        self.allow_url_patterns = [re.compile(pattern) for pattern in allow_url_patterns]
+
+        self.requests_allowed = 0
+        self.requests_blocked = 0
+        self.bytes_received = 0
+        self.blocked_by_type = Counter()
+
+    def should_block(self, url, resource_type):
+        """Return True if a request to ``url`` of ``resource_type`` is blocked"""
+        if any(pattern.search(url) for pattern in self.allow_url_patterns):
+            return False
+        if resource_type in self.block_resource_types:
+            return True
+        host = (urlsplit(url).hostname or "").lower()
+        return any(domain in host for domain in self.block_domains)
+
+    @property
+    def enabled(self):
+        return bool(self.block_resource_types or self.block_domains)
+
+    async def attach(self, page):
+        """Install the blocking route and byte counter on ``page``"""
+        if self.enabled:
+            await page.route("**/*", self._handle_route)
+        page.on("requestfinished", self._handle_request_finished)
+
+    async def _handle_route(self, route):
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            self.requests_blocked += 1
+            self.blocked_by_type[request.resource_type] += 1
+            await route.abort("blockedbyclient")
+            return
+        # Let earlier routes (e.g. a traffic replay) handle what is not blocked
+        await route.fallback()
+
+    async def _handle_request_finished(self, request):
+        self.requests_allowed += 1
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        self.bytes_received += sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+
+    def reset(self):
+        """Zero the counters, e.g. at the start of a bot cycle"""
+        self.requests_allowed = 0
+        self.requests_blocked = 0
+        self.bytes_received = 0
+        self.blocked_by_type = Counter()
+
+    def stats(self):
+        """Return the counters as a plain dict"""
+        return {
+            "profile": self.name,
+            "requests_allowed": self.requests_allowed,
+            "requests_blocked": self.requests_blocked,
+            "bytes_received": self.bytes_received,
+            "blocked_by_type": dict(self.blocked_by_type),
+        }
+
+    def summary(self):
+        """One-line human readable summary of the counters"""
+        return (
+            f"{self.name}: {self.requests_allowed} requests allowed, "
+            f"{self.requests_blocked} blocked, {self.bytes_received / 1_048_576:.1f} MiB received"
+        )
+
+
+def _resolve_settings(spec, seen=()):
+    if isinstance(spec, str):
+        if spec not in BUILTIN_PROFILES:
+            raise ValueError(f"Unknown network profile '{spec}'")
+        if spec in seen:
+            raise ValueError(f"Network profile '{spec}' extends itself")
+        return _resolve_settings(BUILTIN_PROFILES[spec], seen + (spec,))
+
+    settings = {"block_resource_types": [], "block_domains": [], "allow_url_patterns": []}
+    if spec.get("extends"):
+        settings = _resolve_settings(spec["extends"], seen)
+    for key in settings:
+        settings[key] = list(settings[key]) + list(spec.get(key, []))
+    return settings
+
+
+_profiles = {}
+
+
+def get_network_profile(spec):
+    """Return the shared NetworkProfile for a config value, or None when unset.
+
+    ``spec`` is either the name of a built-in profile or a dict with
+    ``block_resource_types``, ``block_domains``, ``allow_url_patterns`` and an
+    optional ``extends`` naming the profile it adds to. Equal specs share one
+    instance so their counters add up.
+    """
+    if not spec or spec == "off":
+        return None
+
+    if isinstance(spec, str):
+        name = spec
+    elif isinstance(spec, dict):
+        name = spec.get("name") or repr(sorted(spec.items()))
+    else:
+        raise ValueError(f"Invalid network profile: {spec!r}")
+
+    profile = _profiles.get(name)
+    if profile is None:
+        settings = _resolve_settings(spec)
+        display_name = name if isinstance(spec, str) or spec.get("name") else "custom"
+        profile = NetworkProfile(display_name, **settings)
+        _profiles[name] = profile
+    return profile
+
+
+def active_profiles():
+    """Return every profile created so far"""
+    return list(_profiles.values())
+
+
+def reset_profiles():
+    """Zero the counters of every profile, so the next summaries cover one run or cycle"""
+    for profile in _profiles.values():
+        profile.reset()
@@ -0,0 +1,211 @@
+import asyncio
+import json
+import os
+import shutil
+import time
+from contextlib import asynccontextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: user-data dirs are not locked
+    fcntl = None
+
+
+DEFAULT_MAX_AGE_HOURS = 24
+
+# Written into a user-data dir when it is created, to date the profile
+PROFILE_MARKER = ".amazon_deals_profile"
+# Processes (shards, workers) that can hold a copy of one user-data dir at once
+MAX_USER_DATA_DIR_SLOTS = 16
+
+
+class ProfileStore:
+    """Browser state for one marketplace that survives between runs.
+
+    With ``storage_state`` the cookies and local storage of each scrape are
+    saved to a JSON file and loaded into the next context. With
+    ``user_data_dir`` the pool keeps a persistent Chromium profile open, so the
+    HTTP disk cache (JS bundles) is reused as well. Either is thrown away once
+    it is older than ``max_age_hours``, checked on every scrape, and when
+    invalidate() is called because a scrape that used it saw no promotions at
+    all, since a broken session is the most likely cause. A user-data dir that
+    is still in use is closed and removed once its last page is done.
+
+    Chromium cannot open one user-data dir from two processes, so each process
+    locks the directory it uses; a process that finds it taken uses
+    ``<user_data_dir>.1``, ``.2`` and so on instead.
+    """
+
+    def __init__(self, storage_state=None, user_data_dir=None, max_age_hours=DEFAULT_MAX_AGE_HOURS):
+        if not storage_state and not user_data_dir:
+            raise ValueError("A browser profile needs a storage_state path or a user_data_dir")
+        self.storage_state = storage_state
+        self.user_data_dir = user_data_dir
+        self.max_age_seconds = float(max_age_hours) * 3600
+        # The user-data dir this process has locked, and the open lock file
+        self._user_data_path = None
+        self._lock_file = None
+        self._open_pages = 0
+        self._discard_pending = False
+        self._dir_lock = asyncio.Lock()
+
+    def _expired(self, path):
+        try:
+            return time.time() - os.path.getmtime(path) > self.max_age_seconds
+        except OSError:
+            return True
+
+    def _load_storage_state(self):
+        """Return the saved storage state path if it is fresh and readable"""
+        path = self.storage_state
+        if not os.path.exists(path):
+            return None
+        if self._expired(path):
+            print(f"♻️  Browser state {path} expired, starting fresh")
+            self._remove_storage_state()
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                json.load(f)
+        except (OSError, ValueError):
+            print(f"⚠️  Browser state {path} is unreadable, starting fresh")
+            self._remove_storage_state()
+            return None
+        return path
+
+    def _remove_storage_state(self):
+        try:
+            os.remove(self.storage_state)
+        except OSError:
+            pass
+
+    async def _save_storage_state(self, context):
+        directory = os.path.dirname(self.storage_state)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = await context.storage_state()
+        # Keep the original timestamp so max_age_hours counts from session start
+        created = os.path.getmtime(self.storage_state) if os.path.exists(self.storage_state) else None
+        tmp_path = f"{self.storage_state}.{os.getpid()}.{id(context)}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.storage_state)
+        if created is not None:
+            os.utime(self.storage_state, (created, created))
+
+    def _lock_user_data_dir(self):
+        """Return the user-data dir this process owns, locking a free slot on first use"""
+        if self._user_data_path is not None:
+            return self._user_data_path
+        if fcntl is None:
+            self._user_data_path = self.user_data_dir
+            return self._user_data_path
+
+        parent = os.path.dirname(os.path.abspath(self.user_data_dir))
+        os.makedirs(parent, exist_ok=True)
+        for slot in range(MAX_USER_DATA_DIR_SLOTS):
+            path = self.user_data_dir if slot == 0 else f"{self.user_data_dir}.{slot}"
+            # The lock lives beside the directory, which is removed when it expires
+            lock_file = open(f"{path}.lock", 'w', encoding='utf-8')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+            if slot:
+                print(f"🔒 Browser profile {self.user_data_dir} is in use by another process, using {path}")
+            self._lock_file = lock_file
+            self._user_data_path = path
+            return path
+        raise RuntimeError(
+            f"Browser profile {self.user_data_dir} and its {MAX_USER_DATA_DIR_SLOTS - 1} "
+            "copies are all in use by other processes"
+        )
+
+    def _prepare_user_data_dir(self, path):
+        if not os.path.isdir(path):
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, PROFILE_MARKER), 'w', encoding='utf-8') as f:
+                f.write(str(time.time()))
+
+    async def _discard_user_data_dir(self, pool):
+        path = self._user_data_path
+        await pool.close_persistent(path)
+        shutil.rmtree(path, ignore_errors=True)
+        self._discard_pending = False
+
+    async def invalidate(self, pool=None):
+        """Drop the saved state so the next scrape starts from a blank session.
+
+        A user-data dir needs the ``pool`` its persistent context runs in; it
+        is closed and removed as soon as no page uses it any more.
+        """
+        if self.storage_state:
+            self._remove_storage_state()
+        if self.user_data_dir and self._user_data_path is not None:
+            self._discard_pending = True
+            if pool is not None:
+                async with self._dir_lock:
+                    if self._discard_pending and self._open_pages == 0:
+                        await self._discard_user_data_dir(pool)
+
+    @asynccontextmanager
+    async def page(self, pool):
+        """Yield a page from ``pool`` that starts from, and saves back, this profile"""
+        if self.user_data_dir:
+            path = self._lock_user_data_dir()
+            async with self._dir_lock:
+                # Checked on every scrape, since a bot keeps the context open for days
+                marker = os.path.join(path, PROFILE_MARKER)
+                if not self._discard_pending and os.path.isdir(path) and self._expired(marker):
+                    print(f"♻️  Browser profile {path} expired, starting fresh")
+                    self._discard_pending = True
+                if self._discard_pending and self._open_pages == 0:
+                    await self._discard_user_data_dir(pool)
+                if not pool.has_persistent_context(path):
+                    self._prepare_user_data_dir(path)
+                self._open_pages += 1
+
+            try:
+                async with pool.persistent_page(path) as page:
+                    yield page
+            finally:
+                async with self._dir_lock:
+                    self._open_pages -= 1
+                    if self._discard_pending and self._open_pages == 0:
+                        await self._discard_user_data_dir(pool)
+            return
+
+        storage_state = self._load_storage_state()
+        async with pool.page(storage_state=storage_state) as page:
+            yield page
+            try:
+                await self._save_storage_state(page.context)
+            except Exception as e:
+                print(f"⚠️  Could not save browser state {self.storage_state}: {e}")
+
+
+_stores = {}
+
+
+def get_profile_store(spec):
+    """Return the shared ProfileStore for a site's ``browser_profile`` config, or None.
+
+    ``spec`` is a dict with ``storage_state`` (a JSON file) or
+    ``user_data_dir`` (a Chromium profile directory), plus an optional
+    ``max_age_hours``.
+    """
+    if not spec:
+        return None
+    if not isinstance(spec, dict):
+        raise ValueError(f"Invalid browser profile: {spec!r}")
+
+    key = (spec.get("storage_state"), spec.get("user_data_dir"))
+    store = _stores.get(key)
+    if store is None:
+        store = _stores[key] = ProfileStore(
+            storage_state=spec.get("storage_state"),
+            user_data_dir=spec.get("user_data_dir"),
+            max_age_hours=spec.get("max_age_hours", DEFAULT_MAX_AGE_HOURS),
+        )
+    return store
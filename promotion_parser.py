@@ -0,0 +1,200 @@
+import json
+import sys
+
+from deal import DEFAULT_CURRENCY, Deal, category_id, parse_cents, parse_discount
+
+try:
+    import orjson
+except ImportError:  # optional, json is used when it is not installed
+    orjson = None
+
+
+def loads(data):
+    """Decode a JSON response body (bytes or str), with orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Where each deal field lives in a promotion. Paths start at a named root,
+# and the roots themselves are paths from the promotion: one lookup per root
+# is shared by all of its fields.
+ROOTS = [
+    ("product", "promo", ("product", "entity")),
+    ("option", "product", ("buyingOptions", 0)),
+    ("price", "option", ("price", "entity")),
+]
+
+FIELDS = [
+    ("asin", "product", ("asin",)),
+    ("title", "product", ("title", "entity", "displayString")),
+    ("current_amount", "price", ("priceToPay", "moneyValueOrRange", "value", "amount")),
+    ("currency", "price", ("priceToPay", "moneyValueOrRange", "value", "currencyCode")),
+    ("original_amount", "price", ("basisPrice", "moneyValueOrRange", "value", "amount")),
+    ("savings", "price", ("savings", "percentage", "value")),
+    ("deal_label", "option", ("dealBadge", "entity", "label", "content", "fragments", 0, "text")),
+    ("image_id", "product", ("productImages", "entity", "images", 0, "lowRes", "physicalId")),
+    ("brand_id", "promo", ("brandId",)),
+]
+
+# Roots that must be dicts (when present) for the fast path to apply; anything
+# else means the schema changed and the promotion goes to the fallback parser.
+# Below the roots, a missing or mistyped value just becomes "N/A".
+CHECKED_ROOTS = ("product", "option", "price")
+
+
+# Distinct amount strings whose cents are remembered
+CENTS_CACHE_SIZE = 50000
+
+_LOOKUP_ERRORS = "(KeyError, IndexError, TypeError)"
+
+
+def _lookup(root, path):
+    return root + "".join(f"[{key!r}]" for key in path)
+
+
+def _compile_extractor():
+    """Build extract(promotions, category, category_id, site_id, fallback) from ROOTS and FIELDS"""
+    lines = [
+        "def extract(promotions, category, category_id, site_id, fallback):",
+        "    deals = []",
+        "    append = deals.append",
+        "    for promo in promotions:",
+        "        if type(promo) is not dict:",
+        "            deal = fallback(promo, category)",
+        "            if deal:",
+        "                append(deal)",
+        "            continue",
+    ]
+
+    # Fast path: a promotion with every field present is read in one go
+    lines.append("        try:")
+    for name, parent, path in ROOTS + FIELDS:
+        lines.append(f"            {name} = {_lookup(parent, path)}")
+    roots_are_dicts = " and ".join(f"type({name}) is dict" for name in CHECKED_ROOTS)
+    lines.extend([
+        f"        except {_LOOKUP_ERRORS}:",
+        "            complete = False",
+        "        else:",
+        f"            complete = {roots_are_dicts}",
+        "        if not complete:",
+    ])
+
+    # Otherwise each field is looked up on its own, missing ones becoming MISSING
+    def assign(name, root, path, indent):
+        lines.extend([
+            f"{indent}try:",
+            f"{indent}    {name} = {_lookup(root, path)}",
+            f"{indent}except {_LOOKUP_ERRORS}:",
+            f"{indent}    {name} = MISSING",
+        ])
+
+    for name, parent, path in ROOTS:
+        # A missing parent makes its children missing as well; a parent of the
+        # wrong type leaves None, which fails the check below
+        lines.extend([
+            f"            if {parent} is MISSING:",
+            f"                {name} = MISSING",
+            "            else:",
+            "                try:",
+            f"                    {name} = {_lookup(parent, path)}",
+            "                except (KeyError, IndexError):",
+            f"                    {name} = MISSING",
+            "                except TypeError:",
+            f"                    {name} = None",
+        ])
+
+    checks = " or ".join(f"({name} is not MISSING and type({name}) is not dict)" for name in CHECKED_ROOTS)
+    lines.extend([
+        f"            if product is MISSING or {checks}:",
+        "                deal = fallback(promo, category)",
+        "                if deal:",
+        "                    append(deal)",
+        "                continue",
+    ])
+
+    for name, root, path in FIELDS:
+        lines.append(f"            if {root} is MISSING:")
+        lines.append(f"                {name} = MISSING")
+        lines.append("            else:")
+        assign(name, root, path, indent="                ")
+
+    # The same prices come up again and again, across deals and cycles, so
+    # amount strings are parsed once and looked up after that
+    for name in ("current_amount", "original_amount"):
+        cents = name.replace("amount", "cents")
+        lines.extend([
+            f"        if type({name}) is str:",
+            f"            {cents} = CENTS.get({name})",
+            f"            if {cents} is None:",
+            f"                {cents} = parse_cents({name})",
+            "                if len(CENTS) < CENTS_CACHE_SIZE:",
+            f"                    CENTS[{name}] = {cents}",
+            f"        elif {name} is MISSING:",
+            f"            {cents} = None",
+            "        else:",
+            f"            {cents} = parse_cents({name})",
+        ])
+
+    def interned(name):
+        return f"(intern({name}) if type({name}) is str else {name})"
+
+    lines.extend([
+        "        append(Deal(",
+        "            None if asin is MISSING else asin,",
+        "            None if title is MISSING else title,",
+        "            current_cents,",
+        "            original_cents,",
+        f"            DEFAULT_CURRENCY if currency is MISSING or not currency else {interned('currency')},",
+        "            None if savings is MISSING else savings if type(savings) is int and savings > 0 else parse_discount(savings),",
+        f"            None if deal_label is MISSING else {interned('deal_label')},",
+        "            category_id,",
+        f"            None if brand_id is MISSING else {interned('brand_id')},",
+        "            None if image_id is MISSING else image_id,",
+        "            site_id,",
+        "        ))",
+        "    return deals",
+    ])
+
+    namespace = {
+        "MISSING": _MISSING,
+        "Deal": Deal,
+        "DEFAULT_CURRENCY": DEFAULT_CURRENCY,
+        "parse_cents": parse_cents,
+        "CENTS": _CENTS,
+        "CENTS_CACHE_SIZE": CENTS_CACHE_SIZE,
+        "parse_discount": parse_discount,
+        # shared(), inlined
+        "intern": sys.intern,
+    }
+    exec(compile("\n".join(lines), "<promotion_extractor>", "exec"), namespace)
+    return namespace["extract"]
+
+
+_MISSING = object()
+_CENTS = {}
+_extract = _compile_extractor()
+
+
+class PromotionExtractor:
+    """Turns a page of promotions into Deals in one pass.
+
+    The field lookups are generated once from ROOTS and FIELDS, and the site
+    every deal of a scraper shares is registered up front, so each deal only
+    stores its id. Amount strings seen before reuse their parsed cents.
+    Promotions whose roots do not match go through ``fallback``, the
+    scraper's defensive parse_promotion(). Whenever parse_promotion() keeps a
+    promotion, the extractor produces the same Deal. The two differ on a
+    mistyped field below the roots (say ``productImages: [1]``): the
+    extractor leaves just that field empty, where parse_promotion() drops
+    the whole promotion.
+    """
+
+    def __init__(self, site_id, fallback):
+        self.site_id = site_id
+        self.fallback = fallback
+
+    def extract(self, promotions, category=None):
+        """Return the deals of ``promotions``, skipping the ones that cannot be parsed"""
+        category = category or "All Categories"
+        return _extract(promotions, category, category_id(category), self.site_id, self.fallback)
@@ -0,0 +1,198 @@
+import asyncio
+import json
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import aiohttp
+
+from promotion_parser import loads
+
+
+# Request keys that hold an item offset, advanced by the number of promotions received
+OFFSET_KEYS = ("startIndex", "offset", "start", "from")
+# Request keys that hold a page number, advanced by one
+PAGE_KEYS = ("page", "pageNumber", "pageIndex")
+# Response keys that carry an opaque token for the next page
+TOKEN_KEYS = ("nextPageToken", "nextToken", "paginationToken", "cursor", "nextCursor")
+# Response flags that say whether more pages exist
+MORE_FLAGS = ("hasMore", "hasMoreResults", "moreResultsAvailable", "hasNextPage")
+
+# Headers the HTTP client computes itself or that only make sense inside the browser
+SKIPPED_HEADERS = {"content-length", "host", "connection", "cookie", "accept-encoding"}
+
+
+class ReplayError(Exception):
+    """Raised when a captured promotions request cannot be replayed"""
+
+
+class CapturedRequest:
+    """A promotions API request seen in the browser, with its pagination state"""
+
+    def __init__(self, method, url, headers, post_data, entity):
+        self.method = method
+        self.url = url
+        self.headers = {
+            key: value
+            for key, value in headers.items()
+            if not key.startswith(":") and key.lower() not in SKIPPED_HEADERS
+        }
+        self.body = None
+        self.raw_body = post_data
+        if post_data:
+            try:
+                self.body = json.loads(post_data)
+            except ValueError:
+                self.body = None
+        self.entity = entity or {}
+
+    @classmethod
+    async def from_response(cls, response, data):
+        request = response.request
+        headers = await request.all_headers()
+        return cls(request.method, request.url, headers, request.post_data, data.get("entity"))
+
+    def following(self, url, body, entity):
+        """Return the request state after replaying ``url``/``body``"""
+        captured = CapturedRequest(self.method, url, self.headers, self.raw_body, entity)
+        captured.body = body
+        return captured
+
+    def next_page(self, received):
+        """Return the (url, body) of the page after this one, or None if unknown"""
+        token = _find_key(self.entity, TOKEN_KEYS)
+        parts = urlsplit(self.url)
+        query = dict(parse_qsl(parts.query, keep_blank_values=True))
+        body = json.loads(json.dumps(self.body)) if self.body is not None else None
+
+        advanced = False
+        if token is not None:
+            key, value = token
+            if body is not None and _set_key(body, (key,), value):
+                advanced = True
+            elif key in query or body is None:
+                query[key] = value
+                advanced = True
+
+        if not advanced:
+            advanced = (
+                _advance(query, body, OFFSET_KEYS, received)
+                or _advance(query, body, PAGE_KEYS, 1)
+            )
+
+        if not advanced:
+            return None
+
+        url = urlunsplit(parts._replace(query=urlencode(query)))
+        return url, body
+
+    def has_more(self):
+        """Return False when the last response said there are no more pages"""
+        return has_more_pages(self.entity)
+
+
+def has_more_pages(entity):
+    """Return False when a promotions response entity says it is the last page"""
+    flag = _find_key(entity, MORE_FLAGS)
+    return flag is None or bool(flag[1])
+
+
+def more_pages_signal(entity):
+    """Return whether a response entity says more pages follow: its has-more flag,
+    else True when it carries a next-page token, else None (it does not say)"""
+    flag = _find_key(entity, MORE_FLAGS)
+    if flag is not None:
+        return bool(flag[1])
+    if _find_key(entity, TOKEN_KEYS) is not None:
+        return True
+    return None
+
+
+def _find_key(data, keys, depth=3):
+    if not isinstance(data, dict) or depth < 0:
+        return None
+    for key in keys:
+        if data.get(key) not in (None, ""):
+            return key, data[key]
+    for value in data.values():
+        found = _find_key(value, keys, depth - 1)
+        if found is not None:
+            return found
+    return None
+
+
+def _set_key(data, keys, value, depth=3):
+    if not isinstance(data, dict) or depth < 0:
+        return False
+    for key in keys:
+        if key in data:
+            data[key] = value(data[key]) if callable(value) else value
+            return True
+    return any(_set_key(child, keys, value, depth - 1) for child in data.values())
+
+
+def _advance(query, body, keys, step):
+    def bump(current):
+        return int(current) + step
+
+    try:
+        if body is not None and _set_key(body, keys, bump):
+            return True
+        for key in keys:
+            if key in query:
+                query[key] = str(int(query[key]) + step)
+                return True
+    except (TypeError, ValueError):
+        return False
+    return False
+
+
+class PromotionsApiClient:
+    """Pooled HTTP client that pages through the promotions API directly"""
+
+    def __init__(self, max_connections=20, timeout=20):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def fetch_page(self, captured, url, body, cookies):
+        """Send one replayed request and return the decoded promotions response"""
+        headers = dict(captured.headers)
+        if cookies:
+            headers["cookie"] = "; ".join(f"{c['name']}={c['value']}" for c in cookies)
+
+        data = None
+        if body is not None:
+            data = json.dumps(body)
+        elif captured.raw_body:
+            data = captured.raw_body
+
+        session = self._get_session()
+        try:
+            async with session.request(captured.method, url, headers=headers, data=data) as response:
+                if response.status != 200:
+                    raise ReplayError(f"promotions API returned HTTP {response.status}")
+                payload = await response.json(content_type=None, loads=loads)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as exc:
+            raise ReplayError(str(exc)) from exc
+
+        if not isinstance(payload, dict) or "rankedPromotions" not in payload.get("entity", {}):
+            raise ReplayError("unexpected promotions API response shape")
+        return payload
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
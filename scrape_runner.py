@@ -0,0 +1,194 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from deal import Deal
+from scraper import AmazonDealsScraper
+from network_profile import get_network_profile
+from profile_store import get_profile_store
+
+
+# Without a "concurrency" block in config.json, categories run one at a time
+# with the same pause between them as the original sequential loop.
+DEFAULT_CONCURRENCY = {
+    "global": 1,
+    "per_site": 1,
+    "delay_seconds": 3,
+}
+
+
+@dataclass
+class ScrapeJob:
+    site_name: str
+    base_url: str
+    marketplace_id: str
+    category: str
+    site_limit: Optional[int] = None
+    api_replay: bool = False
+    network_profile: Any = None
+    single_page: bool = False
+    browser_profile: Any = None
+
+
+@dataclass
+class ScrapeResult:
+    job: ScrapeJob
+    scraper: Optional[AmazonDealsScraper]
+    deals: List[Deal] = field(default_factory=list)
+    error: Optional[BaseException] = None
+
+
+def concurrency_settings(config: Dict) -> Dict:
+    settings = dict(DEFAULT_CONCURRENCY)
+    overrides = config.get("concurrency") if isinstance(config, dict) else None
+    if isinstance(overrides, dict):
+        for key in settings:
+            if overrides.get(key) is not None:
+                settings[key] = overrides[key]
+
+    settings["global"] = max(1, int(settings["global"]))
+    settings["per_site"] = max(1, int(settings["per_site"]))
+    settings["delay_seconds"] = max(0.0, float(settings["delay_seconds"]))
+    return settings
+
+
+def build_scrape_jobs(sites: List[Dict]) -> List[ScrapeJob]:
+    jobs: List[ScrapeJob] = []
+    for site in sites:
+        categories = (
+            AmazonDealsScraper.CATEGORIES
+            if site.get("scrape_all")
+            else site.get("categories", [])
+        )
+        for category in categories:
+            jobs.append(
+                ScrapeJob(
+                    site_name=site.get("name", "Amazon Site"),
+                    base_url=site.get("base_url", AmazonDealsScraper.DEFAULT_BASE_URL),
+                    marketplace_id=site.get(
+                        "marketplace_id", AmazonDealsScraper.DEFAULT_MARKETPLACE_ID
+                    ),
+                    category=category,
+                    site_limit=site.get("max_concurrency"),
+                    api_replay=bool(site.get("api_replay", False)),
+                    network_profile=site.get("network_profile"),
+                    single_page=bool(site.get("single_page", False)),
+                    browser_profile=site.get("browser_profile"),
+                )
+            )
+    return jobs
+
+
+def batch_scrape_jobs(jobs: List[ScrapeJob]) -> List[List[ScrapeJob]]:
+    """Group the categories of ``single_page`` sites so each site loads its page once"""
+    batches: List[List[ScrapeJob]] = []
+    site_batches: Dict[str, List[ScrapeJob]] = {}
+    for job in jobs:
+        if not job.single_page:
+            batches.append([job])
+            continue
+        batch = site_batches.get(job.site_name)
+        if batch is None:
+            batch = site_batches[job.site_name] = []
+            batches.append(batch)
+        batch.append(job)
+    return batches
+
+
+async def run_scrape_jobs(
+    jobs: List[ScrapeJob],
+    browser_pool,
+    *,
+    global_limit: int = 1,
+    per_site_limit: int = 1,
+    delay_seconds: float = 0,
+    max_pages: Optional[int] = None,
+    api_client=None,
+    on_result: Optional[Callable[[ScrapeResult], Awaitable[None]]] = None,
+    on_deal: Optional[Callable[[ScrapeJob, Deal], Awaitable[None]]] = None,
+) -> List[ScrapeResult]:
+    """Scrape every job with at most ``global_limit`` pages in flight.
+
+    Each site additionally gets at most ``per_site_limit`` concurrent pages
+    (or its own ``site_limit``). Every page runs in its own browser context
+    from ``browser_pool``. Normally a page scrapes one category; the
+    categories of a ``single_page`` site share one page that switches
+    categories in place. After a page finishes, its site slot rests for
+    ``delay_seconds`` before the next page of that site may start, which
+    keeps the request rate per marketplace polite. Jobs with ``api_replay``
+    page through the promotions API with ``api_client``. ``on_result`` is
+    awaited once per category as soon as its page is done.
+
+    With ``on_deal``, pages are scraped through scrape_stream() and
+    ``on_deal(job, deal)`` is awaited for every new deal as soon as it is
+    intercepted, while pagination goes on; a slow ``on_deal`` holds the page
+    back. The deals are the scraper's own; one that a later page updates in
+    place is passed to ``on_deal`` again. ``on_result`` then reports them as
+    usual.
+    """
+    global_slots = asyncio.Semaphore(global_limit)
+    site_slots: Dict[str, asyncio.Semaphore] = {}
+    pending: Dict[str, int] = {}
+    profiles = {}
+    browser_profiles = {}
+    batches = batch_scrape_jobs(jobs)
+    for batch in batches:
+        site_name = batch[0].site_name
+        pending[site_name] = pending.get(site_name, 0) + 1
+        # Resolved up front so a bad profile in config.json fails the run immediately
+        profiles[id(batch)] = get_network_profile(batch[0].network_profile)
+        browser_profiles[id(batch)] = get_profile_store(batch[0].browser_profile)
+
+    async def run(batch: List[ScrapeJob]) -> List[ScrapeResult]:
+        first = batch[0]
+        site_slot = site_slots.get(first.site_name)
+        if site_slot is None:
+            site_slot = asyncio.Semaphore(max(1, first.site_limit or per_site_limit))
+            site_slots[first.site_name] = site_slot
+
+        async with site_slot:
+            async with global_slots:
+                scraper = AmazonDealsScraper(
+                    marketplace_id=first.marketplace_id,
+                    category=first.category if len(batch) == 1 else None,
+                    base_url=first.base_url,
+                    site_name=first.site_name,
+                    browser_pool=browser_pool,
+                    api_replay=first.api_replay,
+                    api_client=api_client,
+                    network_profile=profiles[id(batch)],
+                    browser_profile=browser_profiles[id(batch)],
+                )
+                error = None
+                try:
+                    if on_deal is not None:
+                        jobs_by_category = {job.category: job for job in batch}
+                        categories = [job.category for job in batch] if len(batch) > 1 else None
+                        async for deal in scraper.scrape_stream(
+                            max_pages=max_pages, categories=categories, keep_deals=True
+                        ):
+                            await on_deal(jobs_by_category.get(deal.category, first), deal)
+                    elif len(batch) == 1:
+                        await scraper.scrape(max_pages=max_pages)
+                    else:
+                        await scraper.scrape_categories(
+                            [job.category for job in batch], max_pages=max_pages
+                        )
+                except Exception as exc:  # pylint: disable=broad-exception-caught
+                    error = exc
+
+            pending[first.site_name] -= 1
+            if delay_seconds and pending[first.site_name] > 0:
+                await asyncio.sleep(delay_seconds)
+
+        results = [
+            ScrapeResult(job, scraper, scraper.deals_by_category.get(job.category, []), error)
+            for job in batch
+        ]
+        if on_result is not None:
+            for result in results:
+                await on_result(result)
+        return results
+
+    batch_results = await asyncio.gather(*(run(batch) for batch in batches))
+    return [result for results in batch_results for result in results]
@@ -0,0 +1,727 @@
+import asyncio
+import contextlib
+import ipaddress
+import json
+import csv
+from collections import Counter
+from urllib.parse import urlparse
+
+from browser_pool import BrowserPool
+from deal import DEFAULT_CURRENCY, Deal, category_id, parse_cents, parse_discount, shared, site_id
+from deal_store import DealStore, filter_deals
+from promotion_parser import PromotionExtractor, loads
+from promotions_api import CapturedRequest, PromotionsApiClient, ReplayError, more_pages_signal
+from selector_cache import get_selector_cache, probe_selectors
+from title_index import TitleIndex
+
+
+# Marks the end of a scrape_stream() queue
+_STREAM_END = object()
+
+
+def _is_local_host(host):
+    if host == "localhost":
+        return True
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+class AmazonDealsScraper:
+    DEFAULT_MARKETPLACE_ID = "A1RKKUPIHCS9HS"
+    DEFAULT_BASE_URL = "https://www.amazon.es/-/en/deals"
+
+    # Seconds to wait for a promotions response after loading, clicking or scrolling
+    FIRST_RESPONSE_TIMEOUT = 10
+    RESPONSE_TIMEOUT = 4
+    # Seconds of the single last look for more deals when responses do not say
+    # whether more pages exist
+    FINAL_PROBE_TIMEOUT = 1.5
+    # Consecutive attempts without new deals before giving up while the last
+    # response said more pages exist
+    MAX_NO_NEW_ATTEMPTS = 3
+    # Seconds to wait for any "Show more" selector to become visible
+    SHOW_MORE_PROBE_TIMEOUT = 1.5
+
+    # Candidates for the "View more deals" / "Show more" button, probed together
+    SHOW_MORE_SELECTORS = [
+        '[data-testid="load-more-view-more-button"]',
+        'button[data-testid="load-more-view-more-button"]',
+        'button:has-text("View more deals")',
+        'button:has-text("Show more")',
+        'button[aria-label*="Show more"]',
+        'a[aria-label*="Show more"]',
+    ]
+
+    # Category button names as they appear on the page
+    CATEGORIES = [
+        "Featured Deals",
+        "Trending Deals",
+        "Lightning Deals",
+        "Deals under 20€",
+        "Amazon Devices",
+        "Prime Exclusive",
+        "Computer & Software",
+        "TV, Movies & Home Cinema",
+        "Fashion, Shoes & Bags",
+        "Home & Kitchen",
+        "Phone & Accessories",
+        "Personal Care & Grooming",
+        "Headphones, Speakers & Music",
+        "Sports & Fitness",
+        "Gaming & Accessories",
+        "Pet products",
+        "Beauty",
+        "DIY & Tools",
+        "Toys",
+        "Baby",
+        "Office & School Supplies",
+        "Cameras",
+        "Food & Drinks",
+        "Watches & Jewellery",
+        "Furniture",
+        "Luggage & Backpack",
+        "Car & Motorbike",
+        "Garden & Outdoors",
+        "Books",
+        "Vouchers",
+        "Outlet",
+    ]
+
+    def __init__(self, marketplace_id=None, category=None, base_url=None, site_name=None, browser_pool=None,
+                 api_replay=False, api_client=None, network_profile=None, selector_cache=None,
+                 browser_profile=None, traffic=None, columnar=False):
+        self.marketplace_id = marketplace_id or self.DEFAULT_MARKETPLACE_ID
+        self.category = category
+        self.base_url = base_url or self.DEFAULT_BASE_URL
+        parsed = urlparse(self.base_url)
+        host = (parsed.hostname or "www.amazon.es").lower()
+
+        if host.startswith("data."):
+            api_host = host
+        elif host.startswith("www."):
+            api_host = "data." + host[4:]
+        else:
+            api_host = "data." + host
+
+        self.domain_host = host if not host.startswith("data.") else host.replace("data.", "www.", 1)
+        self.site_name = site_name or self.domain_host
+        if _is_local_host(host):
+            # Local test servers (fake_amazon.py) serve the API from the page's own origin
+            api_origin = f"{parsed.scheme or 'http'}://{parsed.netloc}"
+        else:
+            api_origin = f"https://{api_host}"
+        self.api_url = f"{api_origin}/api/marketplaces/{self.marketplace_id}/promotions"
+        product_host = self.domain_host or "www.amazon.es"
+        product_url_base = product_host if product_host.startswith("http") else f"https://{product_host}"
+        # Deals reference the site through the registry instead of carrying its strings
+        self._site_id = site_id(self.marketplace_id, self.site_name, self.base_url, product_url_base)
+        self._extractor = PromotionExtractor(self._site_id, fallback=self.parse_promotion)
+        # Deals per category; self.deals is the list of the active category
+        self.deals_by_category = {}
+        self.deals = self.deals_by_category.setdefault(self.category, [])
+        # ASIN -> deal per category, so repeated promotions merge instead of piling up
+        self._deal_index = {}
+        self._new_deal_counts = Counter()
+        # Streaming state, set while scrape_stream() is running
+        self._retain_deals = True
+        self._stream_queue = None
+        self._stream_drained = asyncio.Event()
+        self.browser_pool = browser_pool
+        self.api_replay = api_replay
+        self.api_client = api_client
+        self.network_profile = network_profile
+        self.selector_cache = selector_cache or get_selector_cache()
+        self.browser_profile = browser_profile
+        # TrafficRecorder/TrafficReplayer from traffic_replay, for offline runs
+        self.traffic = traffic
+        # Columnar copy of every retained deal for filter_deals(); needs numpy
+        self.deal_store = DealStore() if columnar else None
+        # Title word index for search_deals(), built on first search
+        self._title_index = None
+        self._captured_request = None
+        self._captured_count = 0
+        self._responses_seen = 0
+        self._no_more_pages = False
+        # What the last response said about further pages: True, False or None
+        self._more_pages = None
+        self._promotions_event = asyncio.Event()
+        self._request_categories = {}
+        
+        if self.category:
+            print(f"🎯 [{self.site_name}] Category: {self.category}")
+        else:
+            print(f"🎯 [{self.site_name}] Category: ALL (No filter)")
+
+    def parse_promotion(self, promo, category=None):
+        """Extract deal information from promotion object"""
+        category = category or self.category
+        try:
+            product = promo.get("product", {}).get("entity", {})
+            asin = product.get("asin")
+            
+            # Title - extract displayString from title entity
+            title = None
+            title_data = product.get("title", {})
+            if isinstance(title_data, dict):
+                entity = title_data.get("entity", {})
+                if isinstance(entity, dict):
+                    title = entity.get("displayString")
+            
+            # Pricing
+            buying_options = product.get("buyingOptions", [])
+            price_cents = None
+            basis_price_cents = None
+            currency = None
+            discount = None
+            
+            if buying_options:
+                price_info = buying_options[0].get("price", {}).get("entity", {})
+                
+                price_to_pay = price_info.get("priceToPay", {})
+                if isinstance(price_to_pay, dict):
+                    value = price_to_pay.get("moneyValueOrRange", {}).get("value", {})
+                    price_cents = parse_cents(value.get("amount"))
+                    currency = value.get("currencyCode")
+                
+                basis_price = price_info.get("basisPrice", {})
+                if isinstance(basis_price, dict):
+                    value = basis_price.get("moneyValueOrRange", {}).get("value", {})
+                    basis_price_cents = parse_cents(value.get("amount"))
+                
+                savings = price_info.get("savings", {})
+                if isinstance(savings, dict):
+                    discount = parse_discount(savings.get("percentage", {}).get("value"))
+            
+            # Deal badge
+            deal_label = None
+            if buying_options:
+                deal_badge = buying_options[0].get("dealBadge", {})
+                if isinstance(deal_badge, dict):
+                    label = deal_badge.get("entity", {}).get("label", {})
+                    if isinstance(label, dict):
+                        fragments = label.get("content", {}).get("fragments", [])
+                        deal_label = fragments[0].get("text") if fragments else None
+            
+            # Image
+            image_id = None
+            images = product.get("productImages", {}).get("entity", {}).get("images", [])
+            if images:
+                image_id = images[0].get("lowRes", {}).get("physicalId")
+            
+            return Deal(
+                asin=asin,
+                title=title,
+                price_cents=price_cents,
+                basis_price_cents=basis_price_cents,
+                currency=shared(currency) or DEFAULT_CURRENCY,
+                discount_percent=discount,
+                deal_badge=shared(deal_label),
+                category_id=category_id(category if category else "All Categories"),
+                brand_id=shared(promo.get("brandId")),
+                image_id=image_id,
+                site_id=self._site_id,
+            )
+        except Exception as e:
+            return None
+
+    def _ingest_promotions(self, promotions, category=None, changed=None):
+        """Parse promotions into the category's deals and return the deals that were new.
+
+        Kept deals that a repeat updated in place are appended to ``changed``
+        when it is given.
+        """
+        category = category or self.category
+        deals = self.deals_by_category.setdefault(category, [])
+        index = self._deal_index.setdefault(category, {})
+        new_deals = []
+        for deal in self._extractor.extract(promotions, category):
+            asin = deal.asin
+            if asin and asin in index:
+                # Streams that do not retain deals only remember the ASIN
+                existing = index[asin]
+                if existing is not None and self._merge_deal(existing, deal):
+                    if changed is not None:
+                        changed.append(existing)
+                    if self.deal_store is not None:
+                        self.deal_store.update(existing)
+                    if self._title_index is not None:
+                        self._title_index.add(id(existing), existing)
+                continue
+            
+            if asin:
+                index[asin] = deal if self._retain_deals else None
+            if self._retain_deals:
+                deals.append(deal)
+            new_deals.append(deal)
+        
+        if self.deal_store is not None and self._retain_deals:
+            self.deal_store.extend(new_deals)
+        if self._title_index is not None and self._retain_deals:
+            for deal in new_deals:
+                self._title_index.add(id(deal), deal)
+        self._new_deal_counts[category] += len(new_deals)
+        return new_deals
+
+    async def _emit(self, deals):
+        """Hand new deals to a running scrape_stream() consumer"""
+        queue = self._stream_queue
+        for deal in deals:
+            # The consumer may leave while this waits for queue space
+            if queue is None or self._stream_queue is not queue:
+                return
+            await queue.put(deal)
+
+    async def _wait_for_stream_space(self):
+        """Hold off loading more pages while the stream consumer is behind"""
+        while self._stream_queue is not None and self._stream_queue.full():
+            self._stream_drained.clear()
+            await self._stream_drained.wait()
+
+    @staticmethod
+    def _merge_deal(existing, deal):
+        """Update ``existing`` in place with the known values of a repeat of the same deal.
+
+        Returns whether anything changed.
+        """
+        return existing.merge(deal)
+
+    def _activate_category(self, category):
+        """Make ``category`` the one new promotions responses are attributed to"""
+        self.category = category
+        self.deals = self.deals_by_category.setdefault(category, [])
+        self._captured_request = None
+        self._captured_count = 0
+        self._no_more_pages = False
+        self._more_pages = None
+
+    async def intercept_api_calls(self, page):
+        """Intercept and capture API responses"""
+        def handle_request(request):
+            # Remember which category was active when the request left the page,
+            # so late responses are not credited to the next category
+            if self.api_url in request.url:
+                self._request_categories[request] = self.category
+        
+        def forget_request(request):
+            self._request_categories.pop(request, None)
+        
+        async def handle_response(response):
+            if self.api_url not in response.url:
+                return
+            category = self._request_categories.get(response.request, self.category)
+            try:
+                if response.status != 200:
+                    return
+                data = loads(await response.body())
+                if "entity" in data and "rankedPromotions" in data["entity"]:
+                    promotions = data["entity"]["rankedPromotions"]
+                    changed = []
+                    new_deals = self._ingest_promotions(promotions, category, changed)
+                    print(f"   ✓ Intercepted {len(promotions)} deals from page ({len(new_deals)} new)")
+                    
+                    if category == self.category:
+                        if self.api_replay:
+                            # Keep the latest request so replay continues after it
+                            self._captured_request = await CapturedRequest.from_response(response, data)
+                            self._captured_count = len(promotions)
+                        
+                        # An empty page only ends the category when nothing says more follow
+                        self._more_pages = more_pages_signal(data["entity"])
+                        self._no_more_pages = (
+                            self._more_pages is False
+                            or (self._more_pages is None and not promotions)
+                        )
+                        self._responses_seen += 1
+                        self._promotions_event.set()
+                    
+                    # Signal the pagination loop first so a slow consumer cannot stall it
+                    await self._emit(new_deals + changed)
+            except Exception:
+                pass
+            finally:
+                forget_request(response.request)
+        
+        page.on("request", handle_request)
+        page.on("response", handle_response)
+        page.on("requestfailed", forget_request)
+
+    async def _wait_for_promotions(self, since, timeout):
+        """Wait until a promotions response newer than ``since`` was handled; False on timeout"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self._responses_seen <= since:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            self._promotions_event.clear()
+            try:
+                await asyncio.wait_for(self._promotions_event.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    async def _replay_promotions(self, page, max_pages=None):
+        """Page through the promotions API from Python; returns False if the browser must take over"""
+        captured = self._captured_request
+        if captured is None:
+            print("   ⚠️  No promotions request captured, falling back to the browser")
+            return False
+        
+        cookies = await page.context.cookies([self.api_url])
+        client = self.api_client or PromotionsApiClient()
+        page_num = 1
+        received = self._captured_count
+        empty_pages = 0
+        
+        print("⚡ Replaying promotions API directly...")
+        try:
+            while captured.has_more():
+                if max_pages and page_num >= max_pages:
+                    print(f"   ✓ Reached maximum pages limit ({max_pages})")
+                    break
+                
+                next_page = captured.next_page(received)
+                if next_page is None:
+                    print("   ⚠️  Could not find a pagination cursor, falling back to the browser")
+                    return False
+                
+                url, body = next_page
+                payload = await client.fetch_page(captured, url, body, cookies)
+                promotions = payload["entity"]["rankedPromotions"]
+                page_num += 1
+                
+                if not promotions:
+                    # An empty page is the end unless the API says more follow
+                    empty_pages += 1
+                    if more_pages_signal(payload["entity"]) is not True or empty_pages > 1:
+                        break
+                    captured = captured.following(url, body, payload["entity"])
+                    received = 0
+                    continue
+                empty_pages = 0
+                
+                changed = []
+                new_deals = self._ingest_promotions(promotions, changed=changed)
+                print(f"   ✓ Replayed page {page_num}: {len(promotions)} deals, {len(new_deals)} new "
+                      f"(Total: {self._new_deal_counts[self.category]})")
+                await self._emit(new_deals + changed)
+                if not new_deals:
+                    # The API is repeating itself; treat it as the last page
+                    break
+                captured = captured.following(url, body, payload["entity"])
+                received = len(promotions)
+        except ReplayError as e:
+            print(f"   ⚠️  API replay failed ({e}), falling back to the browser")
+            return False
+        finally:
+            if client is not self.api_client:
+                await client.close()
+        
+        print(f"   ✓ Reached end of available deals")
+        return True
+
+    async def _run_on_page(self, work):
+        """Run ``work(page)`` on a page from the browser pool"""
+        if self.browser_pool is not None:
+            return await self._run_on_pool_page(self.browser_pool, work)
+
+        # Standalone use: run on a private pool that lives for this scrape only
+        async with BrowserPool() as pool:
+            return await self._run_on_pool_page(pool, work)
+
+    async def _run_on_pool_page(self, pool, work):
+        # Recordings and replays always start from a clean context
+        if self.traffic is not None:
+            async with pool.page(**self.traffic.context_options()) as page:
+                return await work(page)
+        
+        if self.browser_profile is None:
+            async with pool.page() as page:
+                return await work(page)
+        
+        async with self.browser_profile.page(pool) as page:
+            result = await work(page)
+        if self._responses_seen == 0:
+            print(f"   ⚠️  No promotions seen, discarding saved browser state for {self.site_name}")
+            await self.browser_profile.invalidate(pool)
+        return result
+
+    async def scrape(self, max_pages=None):
+        """Scrape Amazon deals using Playwright - continues until no new products found"""
+        return await self._run_on_page(lambda page: self._scrape_page(page, max_pages))
+
+    async def scrape_categories(self, categories, max_pages=None):
+        """Scrape several categories from one page load; returns {category: deals}"""
+        return await self._run_on_page(
+            lambda page: self._scrape_categories_on_page(page, categories, max_pages)
+        )
+
+    async def scrape_stream(self, max_pages=None, categories=None, queue_size=100, keep_deals=False):
+        """Yield deals as soon as they are intercepted while scrolling goes on.
+
+        Usage: ``async for deal in scraper.scrape_stream(): ...``. New deals go
+        through a bounded queue, so a slow consumer pauses pagination instead of
+        letting deals pile up. Unless ``keep_deals`` is set, yielded deals are
+        not kept in ``self.deals``; only their ASINs are remembered for
+        deduplication. With ``keep_deals``, a deal that a later page updates in
+        place is yielded again. ``categories`` streams several categories from one page
+        load, like scrape_categories().
+        """
+        queue = self._stream_queue = asyncio.Queue(maxsize=queue_size)
+        self._retain_deals = keep_deals
+        
+        async def run():
+            consumer_left = False
+            try:
+                if categories:
+                    await self.scrape_categories(categories, max_pages=max_pages)
+                else:
+                    await self.scrape(max_pages=max_pages)
+            except asyncio.CancelledError:
+                # Cancelled because the consumer left; nobody waits for the end marker
+                consumer_left = True
+                raise
+            finally:
+                if not consumer_left:
+                    await queue.put(_STREAM_END)
+        
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                deal = await queue.get()
+                self._stream_drained.set()
+                if deal is _STREAM_END:
+                    break
+                yield deal
+            # Surface scrape errors to the consumer
+            await task
+        finally:
+            self._stream_queue = None
+            self._retain_deals = True
+            if not task.done():
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+            # Wake response handlers still waiting for queue space
+            while not queue.empty():
+                queue.get_nowait()
+            self._stream_drained.set()
+
+    async def _scrape_page(self, page, max_pages=None):
+        """Run the scrape loop on an already opened page"""
+        await self._open_deals_page(page)
+        await self._select_category(page)
+        await self._paginate(page, max_pages)
+        return self.deals
+
+    async def _scrape_categories_on_page(self, page, categories, max_pages=None):
+        """Load the deals page once, then switch categories in place"""
+        await self._open_deals_page(page)
+        
+        for i, category in enumerate(categories, 1):
+            print(f"\n📂 [{self.site_name}] [{i}/{len(categories)}] Switching to category: {category}")
+            self._activate_category(category)
+            await self._select_category(page)
+            await self._paginate(page, max_pages)
+        
+        return {category: self.deals_by_category.get(category, []) for category in categories}
+
+    async def _open_deals_page(self, page):
+        """Hook up interception and load the deals page"""
+        # Set up response interception
+        await self.intercept_api_calls(page)
+        if self.traffic is not None:
+            await self.traffic.attach(page, self.api_url)
+        if self.network_profile is not None:
+            await self.network_profile.attach(page)
+        
+        print(f"📄 Loading Amazon deals page: {self.base_url}")
+        await page.goto(self.base_url, wait_until="networkidle", timeout=30000)
+
+    async def _select_category(self, page):
+        """Click the active category's button and wait for its first promotions"""
+        if self.category:
+            print(f"   🔘 Clicking category: {self.category}")
+            try:
+                seen = self._responses_seen
+                button = page.locator(f'button:has-text("{self.category}")').first
+                await button.click(timeout=5000)
+                print(f"   ✓ Category selected")
+                print("⏳ Waiting for API calls...")
+                await self._wait_for_promotions(seen, self.FIRST_RESPONSE_TIMEOUT)
+            except Exception as e:
+                print(f"   ⚠️  Could not click category button: {e}")
+        else:
+            print("⏳ Waiting for API calls...")
+            await self._wait_for_promotions(0, self.FIRST_RESPONSE_TIMEOUT)
+
+    async def _find_show_more_selector(self, page):
+        """Return the "Show more" selector visible on the page, trying this site's last hit first"""
+        selectors = self.selector_cache.ordered(self.domain_host, self.SHOW_MORE_SELECTORS)
+        selector = await probe_selectors(page, selectors, self.SHOW_MORE_PROBE_TIMEOUT)
+        if selector:
+            self.selector_cache.remember(self.domain_host, selector)
+        return selector
+
+    async def _paginate(self, page, max_pages=None):
+        """Load further pages of the active category until no new deals arrive"""
+        if self.api_replay and await self._replay_promotions(page, max_pages):
+            return
+        
+        # Scroll until no new products are found
+        page_num = 1
+        previous_count = self._new_deal_counts[self.category]
+        no_new_products_count = 0
+        
+        while True:
+            if self._no_more_pages:
+                print(f"   ✓ Reached end of available deals")
+                break
+            
+            await self._wait_for_stream_space()
+            print(f"\n📦 Loading more deals (page {page_num + 1})...")
+            seen = self._responses_seen
+            
+            # Try to find and click "View more deals" or "Show more" button
+            button_clicked = False
+            selector = await self._find_show_more_selector(page)
+            if selector:
+                try:
+                    print(f"   🔘 Found 'Show more' button, clicking...")
+                    await page.locator(selector).first.click()
+                    button_clicked = True
+                except Exception:
+                    pass
+            
+            # If no button found, scroll instead
+            if not button_clicked:
+                await page.evaluate("window.scrollBy(0, window.innerHeight * 2)")
+            
+            # Without word from the API that more pages exist, a round that
+            # brought nothing new is followed by one short last probe
+            more_expected = self._more_pages is True
+            max_attempts = self.MAX_NO_NEW_ATTEMPTS if more_expected else 2
+            timeout = self.RESPONSE_TIMEOUT
+            if no_new_products_count and not more_expected:
+                timeout = self.FINAL_PROBE_TIMEOUT
+            
+            # Returns as soon as the next promotions page has been handled
+            await self._wait_for_promotions(seen, timeout)
+            
+            current_count = self._new_deal_counts[self.category]
+            new_products = current_count - previous_count
+            
+            if new_products == 0:
+                no_new_products_count += 1
+                print(f"   ⚠️  No new products found ({no_new_products_count}/{max_attempts})")
+                
+                if no_new_products_count >= max_attempts:
+                    print(f"   ✓ Reached end of available deals")
+                    break
+            else:
+                print(f"   ✓ Found {new_products} new products (Total: {current_count})")
+                no_new_products_count = 0  # Reset counter when new products are found
+            
+            previous_count = current_count
+            page_num += 1
+            
+            if max_pages and page_num > max_pages:
+                print(f"   ✓ Reached maximum pages limit ({max_pages})")
+                break
+
+    def print_deals(self, limit=10, category=None):
+        """Print deals in readable format"""
+        category = category or self.category
+        deals = self.deals_by_category.get(category, [])
+        category_display = category if category else "All Categories"
+        print(f"\n{'='*80}")
+        print(f"✅ RESULTS: Found {len(deals)} deals in {category_display}")
+        print(f"{'='*80}\n")
+        
+        if not deals:
+            return
+        
+        for i, deal in enumerate(deals[:limit], 1):
+            print(f"{i}. {deal['title'][:70]}")
+            print(f"   ASIN: {deal['asin']} | Category: {deal['category']}")
+            print(f"   💰 {deal['current_price']} (was {deal['original_price']}) | {deal['discount']} off")
+            print(f"   🏷️  {deal['deal_badge']}")
+            print(f"   🔗 {deal['product_url']}")
+            print(f"   🌍 {deal.get('site', self.site_name)} ({deal.get('marketplace_id', self.marketplace_id)})")
+            print()
+
+    def save_to_json(self, filename=None):
+        """Save to JSON"""
+        if filename is None:
+            category_name = self.category.lower().replace(" ", "_").replace("&", "and") if self.category else "all"
+            filename = f"amazon_deals_{category_name}.json"
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump([deal.to_dict() for deal in self.deals], f, indent=2, ensure_ascii=False)
+        print(f"✓ Saved {len(self.deals)} deals to {filename}")
+
+    def save_to_csv(self, filename=None):
+        """Save to CSV"""
+        if filename is None:
+            category_name = self.category.lower().replace(" ", "_").replace("&", "and") if self.category else "all"
+            filename = f"amazon_deals_{category_name}.csv"
+        if not self.deals:
+            return
+        
+        rows = [deal.to_dict() for deal in self.deals]
+        with open(filename, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=rows[0].keys())
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"✓ Saved {len(self.deals)} deals to {filename}")
+
+    def search_deals(self, keyword, all_categories=False, limit=None):
+        """Search deal titles for the words of ``keyword``, highest discount first.
+
+        Matching ignores case and accents; every word must appear, ``OR``
+        separates alternatives and ``word*`` matches a prefix. Only the
+        active category is searched unless ``all_categories`` is set.
+        """
+        if self._title_index is None:
+            self._title_index = TitleIndex()
+            for category_deals in self.deals_by_category.values():
+                for deal in category_deals:
+                    self._title_index.add(id(deal), deal)
+        where = None
+        if not all_categories:
+            active = category_id(self.category or "All Categories")
+            where = lambda deal: deal.category_id == active
+        return self._title_index.search(keyword, limit=limit, where=where)
+
+    def filter_deals(self, min_price=None, max_price=None, min_discount=None, site=None, category=None, badge=None):
+        """Return the deals of every category matching all given criteria.
+
+        Prices are in currency units; ``site`` is a site name or marketplace
+        id. Uses the columnar store when the scraper was created with
+        ``columnar=True``.
+        """
+        criteria = dict(min_price=min_price, max_price=max_price, min_discount=min_discount,
+                        site=site, category=category, badge=badge)
+        if self.deal_store is not None:
+            return self.deal_store.filter(**criteria)
+        deals = [deal for category_deals in self.deals_by_category.values() for deal in category_deals]
+        return filter_deals(deals, **criteria)
+
+    def filter_by_discount(self, min_discount=10):
+        """Filter deals by minimum discount percentage"""
+        return self.filter_deals(min_discount=min_discount, category=self.category or "All Categories")
+
+    def print_search_results(self, results, title="Search Results"):
+        """Print search results"""
+        print(f"\n{'='*80}")
+        print(f"🔍 {title}: {len(results)} items found")
+        print(f"{'='*80}\n")
+        
+        for i, deal in enumerate(results, 1):
+            print(f"{i}. {deal['title'][:70]}")
+            print(f"   ASIN: {deal['asin']} | {deal['discount']} off")
+            print(f"   💰 {deal['current_price']} (was {deal['original_price']})")
+            print(f"   🔗 {deal['product_url']}")
+            print()
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import os
+import tempfile
+
+
+DEFAULT_CACHE_PATH = "selector_cache.json"
+
+
+class SelectorCache:
+    """Remembers which selector worked per site, persisted to a JSON file"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self._entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self._entries = {key: value for key, value in data.items() if isinstance(value, str)}
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Ignoring unreadable selector cache {path}: {e}")
+
+    def get(self, site_key):
+        return self._entries.get(site_key)
+
+    def ordered(self, site_key, selectors):
+        """Return ``selectors`` with the one remembered for ``site_key`` first"""
+        cached = self._entries.get(site_key)
+        if cached not in selectors:
+            return list(selectors)
+        return [cached] + [selector for selector in selectors if selector != cached]
+
+    def remember(self, site_key, selector):
+        """Record the selector that worked for ``site_key`` and persist it if it changed"""
+        if self._entries.get(site_key) == selector:
+            return
+        self._entries[site_key] = selector
+        self.save()
+
+    def save(self):
+        # A temporary file of its own per save, so concurrent processes never
+        # replace the cache with each other's half-written file
+        directory = os.path.dirname(os.path.abspath(self.path))
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile(
+                'w', encoding='utf-8', dir=directory, prefix=".selector_cache.", suffix=".tmp", delete=False
+            ) as f:
+                tmp_path = f.name
+                json.dump(self._entries, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️  Could not save selector cache {self.path}: {e}")
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+
+_caches = {}
+
+
+def get_selector_cache(path=DEFAULT_CACHE_PATH):
+    """Return the process-wide SelectorCache for ``path``"""
+    cache = _caches.get(path)
+    if cache is None:
+        cache = _caches[path] = SelectorCache(path)
+    return cache
+
+
+async def probe_selectors(page, selectors, timeout):
+    """Return the first of ``selectors`` with a visible match, or None.
+
+    The first selector (normally the cached one) gets an instant check; after
+    that every selector is waited on concurrently and the first one to become
+    visible within ``timeout`` seconds wins.
+    """
+    if not selectors:
+        return None
+
+    try:
+        if await page.locator(selectors[0]).first.is_visible():
+            return selectors[0]
+    except Exception:
+        pass
+
+    async def probe(selector):
+        await page.locator(selector).first.wait_for(state="visible", timeout=timeout * 1000)
+        return selector
+
+    tasks = [asyncio.create_task(probe(selector)) for selector in selectors]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                return await next_done
+            except Exception:
+                continue
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,131 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from browser_pool import BrowserPool
+from network_profile import active_profiles
+from promotions_api import PromotionsApiClient
+from scrape_runner import ScrapeJob, ScrapeResult, batch_scrape_jobs, run_scrape_jobs
+
+
+DEFAULT_PROCESSES = {
+    "workers": 1,
+    "shard_categories": False,
+}
+
+
+def process_settings(config: Dict) -> Dict:
+    settings = dict(DEFAULT_PROCESSES)
+    overrides = config.get("processes") if isinstance(config, dict) else None
+    if isinstance(overrides, dict):
+        for key in settings:
+            if overrides.get(key) is not None:
+                settings[key] = overrides[key]
+
+    workers = settings["workers"]
+    if workers in ("auto", 0):
+        workers = os.cpu_count() or 1
+    settings["workers"] = max(1, int(workers))
+    settings["shard_categories"] = bool(settings["shard_categories"])
+    return settings
+
+
+def shard_jobs(jobs: List[ScrapeJob], workers: int, shard_categories: bool = False) -> List[List[ScrapeJob]]:
+    """Split jobs into at most ``workers`` shards of roughly equal size.
+
+    By default every site stays in one shard, so each marketplace is scraped
+    by a single browser. With ``shard_categories`` the categories of a site
+    are spread over shards as well; a ``single_page`` site is never split,
+    since its categories share one page.
+    """
+    if shard_categories:
+        units = batch_scrape_jobs(jobs)
+    else:
+        by_site: Dict[str, List[ScrapeJob]] = {}
+        for job in jobs:
+            by_site.setdefault(job.site_name, []).append(job)
+        units = list(by_site.values())
+
+    shards: List[List[ScrapeJob]] = [[] for _ in range(min(workers, len(units)))]
+    # Largest units first, each onto the currently smallest shard
+    for unit in sorted(units, key=len, reverse=True):
+        min(shards, key=len).extend(unit)
+    return [shard for shard in shards if shard]
+
+
+def _scrape_shard(jobs: List[ScrapeJob], concurrency: Dict, max_pages: Optional[int]) -> List[ScrapeResult]:
+    """Worker process entry point: scrape one shard with its own browser"""
+    return asyncio.run(_scrape_shard_async(jobs, concurrency, max_pages))
+
+
+async def _scrape_shard_async(jobs: List[ScrapeJob], concurrency: Dict, max_pages: Optional[int]) -> List[ScrapeResult]:
+    async with BrowserPool() as pool, PromotionsApiClient() as api_client:
+        results = await run_scrape_jobs(
+            jobs,
+            pool,
+            global_limit=concurrency["global"],
+            per_site_limit=concurrency["per_site"],
+            delay_seconds=concurrency["delay_seconds"],
+            max_pages=max_pages,
+            api_client=api_client,
+        )
+
+    for profile in active_profiles():
+        print(f"📊 [worker {os.getpid()}] Network profile {profile.summary()}")
+
+    # Scrapers hold browser handles and errors may not pickle; send plain data back
+    return [
+        ScrapeResult(
+            result.job,
+            None,
+            result.deals,
+            RuntimeError(f"{type(result.error).__name__}: {result.error}") if result.error else None,
+        )
+        for result in results
+    ]
+
+
+async def run_sharded_scrape(
+    jobs: List[ScrapeJob],
+    *,
+    workers: int,
+    concurrency: Dict,
+    shard_categories: bool = False,
+    max_pages: Optional[int] = None,
+    on_result: Optional[Callable[[ScrapeResult], Awaitable[None]]] = None,
+) -> List[ScrapeResult]:
+    """Scrape ``jobs`` in worker processes, each running its own browser.
+
+    ``concurrency`` (see scrape_runner.concurrency_settings) applies inside
+    every worker. Results come back with ``scraper`` set to None, and
+    ``on_result`` is awaited in the parent as each shard finishes.
+    """
+    shards = shard_jobs(jobs, workers, shard_categories)
+    if not shards:
+        return []
+
+    loop = asyncio.get_running_loop()
+    # Forking a process that runs an event loop and the Playwright driver is unsafe
+    mp_context = multiprocessing.get_context("spawn")
+    results: List[ScrapeResult] = []
+
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=mp_context) as executor:
+        async def run_shard(shard: List[ScrapeJob]) -> List[ScrapeResult]:
+            try:
+                return await loop.run_in_executor(
+                    executor, _scrape_shard, shard, concurrency, max_pages
+                )
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                # A crashed worker fails its own shard, not the whole run
+                return [ScrapeResult(job, None, [], exc) for job in shard]
+
+        for next_done in asyncio.as_completed([run_shard(shard) for shard in shards]):
+            shard_results = await next_done
+            for result in shard_results:
+                results.append(result)
+                if on_result is not None:
+                    await on_result(result)
+
+    return results
@@ -0,0 +1,38 @@
+import pickle
+
+from deal import Deal, category_id, site_id
+
+
+def test_pickle_round_trip_keeps_values_not_ids():
+    deal = Deal(
+        asin="B000000001",
+        title="Cámara Réflex",
+        price_cents=1299,
+        basis_price_cents=2599,
+        discount_percent=50,
+        deal_badge="Lightning Deal",
+        category_id=category_id("Pickled Category"),
+        brand_id="brand-1",
+        image_id="B000000001L",
+        site_id=site_id("A1RKKUPIHCS9HS", "Amazon Spain", "https://www.amazon.es/-/en/deals"),
+        categories=["Beauty", "Pickled Category"],
+    )
+    copy = pickle.loads(pickle.dumps(deal))
+    assert copy == deal
+    assert copy is not deal
+    assert dict(copy) == dict(deal)
+    assert copy.category == "Pickled Category"
+    assert (copy.site, copy.marketplace_id) == ("Amazon Spain", "A1RKKUPIHCS9HS")
+    assert copy.categories == deal.categories and copy.categories is not deal.categories
+
+
+def test_pickle_round_trip_of_an_empty_deal():
+    deal = Deal()
+    assert pickle.loads(pickle.dumps(deal)) == deal
+
+
+def test_merge_reports_whether_anything_changed():
+    deal = Deal(asin="B000000001", title="Lego", price_cents=1299, deal_badge="Lightning Deal")
+    assert not deal.merge(Deal(asin="B000000001", price_cents=1299))
+    assert deal.merge(Deal(asin="B000000001", title="", price_cents=999))
+    assert (deal.title, deal.price_cents, deal.deal_badge) == ("Lego", 999, "Lightning Deal")
@@ -0,0 +1,73 @@
+from deal_state_cache import DealStateCache, deal_key, fingerprint
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def document(asin, price="€9.99", **fields):
+    return dict(_id=f"id-{asin}", asin=asin, marketplace_id="A1RKKUPIHCS9HS", site="Amazon Spain",
+                current_price=price, categories=["Beauty"], **fields)
+
+
+def key(asin):
+    return deal_key("A1RKKUPIHCS9HS", "Amazon Spain", asin)
+
+
+def test_get_returns_the_stored_state():
+    cache = DealStateCache()
+    cache.put(document("A"))
+    state = cache.get(key("A"))
+    assert (state.document_id, state.current_price, state.categories) == ("id-A", "€9.99", ("Beauty",))
+    assert state.fingerprint == fingerprint(document("A"))
+    assert cache.get(key("B")) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_fingerprint_follows_stored_fields_only():
+    assert fingerprint(document("A")) != fingerprint(document("A", price="€8.99"))
+    assert fingerprint(document("A")) == fingerprint(dict(document("A"), last_seen="later"))
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = DealStateCache(max_size=2)
+    cache.put(document("A"))
+    cache.put(document("B"))
+    # Reading A makes B the least recently used
+    assert cache.get(key("A")) is not None
+    cache.put(document("C"))
+    assert len(cache) == 2
+    assert cache.get(key("B")) is None
+    assert cache.get(key("A")) is not None and cache.get(key("C")) is not None
+
+
+def test_bulk_loaded_entries_go_first():
+    cache = DealStateCache(max_size=2)
+    cache.put(document("A"))
+    cache.put(document("B"), recent=False)
+    cache.put(document("C"))
+    assert cache.get(key("B")) is None
+    assert cache.get(key("A")) is not None
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = DealStateCache(ttl_seconds=10, clock=clock)
+    cache.put(document("A"))
+    clock.now = 9.9
+    assert cache.get(key("A")) is not None
+    clock.now = 10
+    assert cache.get(key("A")) is None
+    assert len(cache) == 0
+
+
+def test_discard():
+    cache = DealStateCache()
+    cache.put(document("A"))
+    cache.discard(key("A"))
+    cache.discard(key("unknown"))
+    assert cache.get(key("A")) is None
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from deal import Deal, category_id, site_id
+from deal_store import DealStore, filter_deals
+
+pytest.importorskip("numpy")
+
+SITES = [
+    site_id("A1RKKUPIHCS9HS", "Amazon Spain", "https://www.amazon.es/-/en/deals"),
+    site_id("A1PA6795UKMFR9", "Amazon Germany", "https://www.amazon.de/deals"),
+]
+CATEGORIES = ["Beauty", "Outlet", "Toys"]
+BADGES = [None, "Lightning Deal", "Limited time deal"]
+
+
+def random_deals(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        Deal(
+            asin=f"B{n:09d}",
+            title=f"Deal {n}",
+            price_cents=rng.choice([None, rng.randint(1, 20000)]),
+            discount_percent=rng.choice([None, rng.randint(1, 90), 12.5]),
+            deal_badge=rng.choice(BADGES),
+            category_id=category_id(rng.choice(CATEGORIES)),
+            site_id=rng.choice(SITES),
+        )
+        for n in range(count)
+    ]
+
+
+CRITERIA = [
+    {},
+    {"min_price": 20},
+    {"max_price": 49.99},
+    {"min_price": 10, "max_price": 100, "min_discount": 30},
+    {"min_discount": 12.5},
+    {"site": "Amazon Germany"},
+    {"site": "A1RKKUPIHCS9HS", "category": "Outlet"},
+    {"category": "Unknown category"},
+    {"badge": "Lightning Deal", "max_price": 80},
+    {"badge": "Not a badge"},
+]
+
+
+@pytest.mark.parametrize("criteria", CRITERIA)
+def test_mask_matches_filter_deals(criteria):
+    deals = random_deals(3000)
+    store = DealStore(deals)
+    assert store.filter(**criteria) == filter_deals(deals, **criteria)
+    assert store.count(**criteria) == len(filter_deals(deals, **criteria))
+
+
+def test_update_keeps_parity_after_in_place_changes():
+    deals = random_deals(200)
+    store = DealStore(deals)
+    for deal in deals[::3]:
+        deal.price_cents = 1000
+        deal.deal_badge = "Lightning Deal"
+        store.update(deal)
+    for criteria in CRITERIA:
+        assert store.filter(**criteria) == filter_deals(deals, **criteria)
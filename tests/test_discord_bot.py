@@ -0,0 +1,240 @@
+import asyncio
+import copy
+import itertools
+
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+import discord_bot
+from deal import Deal, category_id, site_id
+from deal_state_cache import DealStateCache
+from discord_bot import DealMonitorBot
+
+SPAIN = site_id("A1RKKUPIHCS9HS", "Amazon Spain", "https://www.amazon.es/-/en/deals")
+GERMANY = site_id("A1PA6795UKMFR9", "Amazon Germany", "https://www.amazon.de/deals")
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self._documents = iter(documents)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._documents)
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+
+class FakeCollection:
+    """The parts of a Motor collection the bot's persistence uses, in memory"""
+
+    def __init__(self):
+        self.documents = {}
+        self.finds = []
+        self.bulk_writes = []
+        self.update_manys = []
+        # ASINs whose writes fail inside bulk_write
+        self.failing_asins = set()
+
+    def find(self, query):
+        asins = set(query["asin"]["$in"])
+        self.finds.append(asins)
+        return FakeCursor([copy.deepcopy(doc) for doc in self.documents.values() if doc["asin"] in asins])
+
+    async def bulk_write(self, operations, ordered=True):
+        assert not ordered
+        self.bulk_writes.append(operations)
+        errors = []
+        for index, operation in enumerate(operations):
+            if isinstance(operation, InsertOne):
+                document = operation._doc
+                if document["asin"] in self.failing_asins:
+                    errors.append({"index": index, "code": 11000, "errmsg": "duplicate key"})
+                    continue
+                # Like the driver, give the inserted document its _id in place
+                document.setdefault("_id", ObjectId())
+                self.documents[document["_id"]] = copy.deepcopy(document)
+            else:
+                assert isinstance(operation, UpdateOne)
+                stored = self.documents[operation._filter["_id"]]
+                if stored["asin"] in self.failing_asins:
+                    errors.append({"index": index, "code": 121, "errmsg": "validation failed"})
+                    continue
+                stored.update(copy.deepcopy(operation._doc["$set"]))
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(operations) - len(errors)})
+
+    async def update_many(self, query, update):
+        ids = query["_id"]["$in"]
+        self.update_manys.append(ids)
+        for document_id in ids:
+            self.documents[document_id].update(update["$set"])
+
+    def by_asin(self, asin):
+        return [doc for doc in self.documents.values() if doc["asin"] == asin]
+
+
+def make_bot(collection, state_cache=None):
+    bot = DealMonitorBot.__new__(DealMonitorBot)
+    bot.deals = collection
+    bot.state_cache = state_cache
+    return bot
+
+
+_asins = itertools.count(1)
+
+
+def make_deal(asin=None, price_cents=1299, site=SPAIN, **fields):
+    return Deal(
+        asin=asin or f"B{next(_asins):09d}",
+        title=fields.pop("title", "Lego City"),
+        price_cents=price_cents,
+        basis_price_cents=2599,
+        discount_percent=50,
+        category_id=category_id("Beauty"),
+        site_id=site,
+        categories=fields.pop("categories", ["Beauty"]),
+        **fields,
+    )
+
+
+def process(bot, deals, **kwargs):
+    return asyncio.run(bot.process_deals(deals, **kwargs))
+
+
+def test_new_deals_are_inserted_in_one_lookup_and_one_bulk_write():
+    collection = FakeCollection()
+    deals = [make_deal(), make_deal()]
+    results = process(make_bot(collection), deals)
+
+    assert [(deal, change.change_type, is_new) for deal, change, is_new in results] == [
+        (deals[0], "New deal", True), (deals[1], "New deal", True),
+    ]
+    assert len(collection.finds) == 1 and len(collection.bulk_writes) == 1
+    (stored,) = collection.by_asin(deals[0].asin)
+    assert stored["current_price"] == "€12.99" and stored["price_cents"] == 1299
+    assert stored["categories"] == ["Beauty"]
+    assert stored["first_seen"] == stored["last_seen"]
+
+
+def test_changed_deal_sets_only_the_fields_that_differ():
+    collection = FakeCollection()
+    bot = make_bot(collection)
+    deal = make_deal()
+    process(bot, [deal])
+    before = dict(collection.by_asin(deal.asin)[0])
+
+    cheaper = make_deal(deal.asin, price_cents=999, categories=["Outlet"])
+    ((_, change, is_new),) = process(bot, [cheaper])
+
+    assert not is_new
+    assert change.change_type == "Updated deal"
+    assert change.changed_fields == {"current_price": ("€12.99", "€9.99")}
+    (update,) = collection.bulk_writes[-1]
+    assert set(update._doc["$set"]) == {"current_price", "price_cents", "categories", "last_seen"}
+    (after,) = collection.by_asin(deal.asin)
+    # Categories from earlier scrapes are kept
+    assert after["categories"] == ["Beauty", "Outlet"]
+    assert after["first_seen"] == before["first_seen"] and after["last_seen"] > before["last_seen"]
+
+
+def test_unchanged_deals_are_touched_with_one_update_many():
+    collection = FakeCollection()
+    bot = make_bot(collection)
+    deals = [make_deal(), make_deal()]
+    process(bot, deals)
+    writes = len(collection.bulk_writes)
+
+    results = process(bot, [make_deal(deal.asin) for deal in deals])
+
+    assert [change for _, change, _ in results] == [None, None]
+    assert len(collection.bulk_writes) == writes
+    assert collection.update_manys == [[collection.by_asin(deal.asin)[0]["_id"] for deal in deals]]
+
+
+def test_caller_collects_unchanged_ids_when_given_a_list():
+    collection = FakeCollection()
+    bot = make_bot(collection)
+    deal = make_deal()
+    process(bot, [deal])
+
+    unchanged_ids = []
+    process(bot, [make_deal(deal.asin)], unchanged_ids=unchanged_ids)
+    assert collection.update_manys == []
+    assert unchanged_ids == [collection.by_asin(deal.asin)[0]["_id"]]
+
+
+def test_deal_matches_the_document_of_its_own_marketplace():
+    collection = FakeCollection()
+    bot = make_bot(collection)
+    spain = make_deal()
+    process(bot, [spain])
+
+    germany = make_deal(spain.asin, site=GERMANY, price_cents=1499)
+    ((_, change, is_new),) = process(bot, [germany])
+
+    assert is_new and change.change_type == "New deal"
+    assert sorted(doc["marketplace_id"] for doc in collection.by_asin(spain.asin)) == [
+        "A1PA6795UKMFR9", "A1RKKUPIHCS9HS",
+    ]
+
+
+def test_partial_bulk_failure_drops_only_the_failed_deals():
+    collection = FakeCollection()
+    cache = DealStateCache()
+    bot = make_bot(collection, cache)
+    stored = make_deal()
+    process(bot, [stored])
+
+    failing_new = make_deal()
+    collection.failing_asins = {failing_new.asin, stored.asin}
+    deals = [make_deal(), failing_new, make_deal(stored.asin, price_cents=999), make_deal()]
+    results = process(bot, deals)
+
+    assert [deal for deal, _, _ in results] == [deals[0], deals[3]]
+    assert collection.by_asin(failing_new.asin) == []
+    assert collection.by_asin(stored.asin)[0]["price_cents"] == 1299
+    # The failed update is forgotten, so the next cycle reads the document again
+    assert cache.get(discord_bot.deal_key("A1RKKUPIHCS9HS", "Amazon Spain", stored.asin)) is None
+    assert cache.get(discord_bot.deal_key("A1RKKUPIHCS9HS", "Amazon Spain", deals[0].asin)) is not None
+
+
+def test_deals_are_looked_up_in_batches(monkeypatch):
+    monkeypatch.setattr(discord_bot, "DEAL_BATCH_SIZE", 2)
+    collection = FakeCollection()
+    process(make_bot(collection), [make_deal() for _ in range(5)])
+    assert [len(asins) for asins in collection.finds] == [2, 2, 1]
+    assert [len(operations) for operations in collection.bulk_writes] == [2, 2, 1]
+
+
+def test_state_cache_skips_the_lookup_of_unchanged_deals():
+    collection = FakeCollection()
+    bot = make_bot(collection, DealStateCache())
+    deals = [make_deal(), make_deal()]
+    process(bot, deals)
+    finds = len(collection.finds)
+
+    changed = make_deal(deals[1].asin, price_cents=999)
+    results = process(bot, [make_deal(deals[0].asin), changed])
+
+    assert [change is None for _, change, _ in results] == [True, False]
+    # Only the changed deal needed its document
+    assert collection.finds[finds:] == [{changed.asin}]
+
+
+def test_unchanged_deals_are_touched_in_chunks(monkeypatch):
+    monkeypatch.setattr(discord_bot, "DEAL_BATCH_SIZE", 2)
+    collection = FakeCollection()
+    bot = make_bot(collection)
+    deals = [make_deal() for _ in range(5)]
+    process(bot, deals)
+
+    unchanged_ids = []
+    process(bot, [make_deal(deal.asin) for deal in deals], unchanged_ids=unchanged_ids)
+    asyncio.run(bot.touch_unchanged(unchanged_ids))
+    assert [len(ids) for ids in collection.update_manys] == [2, 2, 1]
+    assert sum(collection.update_manys, []) == unchanged_ids
@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+from job_queue import Coordinator, SQLiteBroker
+from scrape_runner import ScrapeJob, build_scrape_jobs
+
+SITES = [{
+    "name": "Amazon Spain",
+    "base_url": "https://www.amazon.es/-/en/deals",
+    "marketplace_id": "A1RKKUPIHCS9HS",
+    "categories": ["Beauty", "Outlet"],
+}]
+
+DEAL = {"asin": "B000000001", "title": "Lego", "current_price": "€12.99", "category": "Beauty"}
+
+
+def make_broker(tmp_path):
+    return SQLiteBroker(str(tmp_path / "jobs.sqlite3"))
+
+
+def enqueue(broker, cycle_id="cycle", max_attempts=2):
+    jobs = build_scrape_jobs(SITES)
+    return asyncio.run(broker.enqueue(cycle_id, jobs, max_attempts))
+
+
+def test_expired_lease_is_retried_then_failed(tmp_path):
+    broker = make_broker(tmp_path)
+    jobs = build_scrape_jobs([dict(SITES[0], categories=["Beauty"])])
+    (job_id,) = asyncio.run(broker.enqueue("cycle", jobs, 2))
+
+    async def run():
+        for attempt in range(2):
+            leased = await broker.lease(f"worker-{attempt}", lease_seconds=0)
+            assert leased[0] == job_id
+            time.sleep(0.01)
+        # The second expired lease used up the attempts
+        assert await broker.lease("worker-2") is None
+        return await broker.cycle_status("cycle")
+
+    assert asyncio.run(run()) == {"failed": 1}
+
+
+def test_failure_is_retried_by_lease_holder_only(tmp_path):
+    broker = make_broker(tmp_path)
+    enqueue(broker, max_attempts=2)
+
+    async def run():
+        job_id, token, job = await broker.lease("worker-a")
+        assert isinstance(job, ScrapeJob)
+        assert not await broker.submit(job_id, "stale-token", "worker-x", [], error="boom")
+        assert await broker.submit(job_id, token, "worker-a", [], error="boom")
+        retried = await broker.lease("worker-b")
+        assert retried[0] == job_id
+        assert await broker.submit(job_id, retried[1], "worker-b", [], error="boom again")
+        return await broker.results_since("cycle")
+
+    (results, _) = asyncio.run(run())
+    assert [(job_id, error) for job_id, _, _, error in results] == [(results[0][0], "boom again")]
+
+
+def test_first_success_wins_even_after_lease_expired(tmp_path):
+    broker = make_broker(tmp_path)
+    enqueue(broker)
+
+    async def run():
+        job_id, token, _ = await broker.lease("worker-a", lease_seconds=0)
+        time.sleep(0.01)
+        _, new_token, _ = await broker.lease("worker-b")
+        assert await broker.submit(job_id, token, "worker-a", [DEAL])
+        assert not await broker.submit(job_id, new_token, "worker-b", [DEAL])
+        results, last_rowid = await broker.results_since("cycle")
+        assert [deal.asin for deal in results[0][2]] == [DEAL["asin"]]
+        assert await broker.results_since("cycle", last_rowid) == ([], last_rowid)
+
+    asyncio.run(run())
+
+
+def test_run_cycle_collects_results_from_workers(tmp_path):
+    broker = make_broker(tmp_path)
+    coordinator = Coordinator(broker, poll_interval=0.01)
+    delivered = []
+
+    async def worker():
+        handled = 0
+        while handled < 2:
+            leased = await broker.lease("worker-a")
+            if leased is None:
+                await asyncio.sleep(0.01)
+                continue
+            job_id, token, job = leased
+            await broker.submit(job_id, token, "worker-a", [dict(DEAL, category=job.category)])
+            handled += 1
+
+    async def on_result(result):
+        delivered.append(result.job.category)
+
+    async def run():
+        return (await asyncio.gather(
+            coordinator.run_cycle(SITES, cycle_id="cycle", on_result=on_result), worker()
+        ))[0]
+
+    results = asyncio.run(run())
+    assert sorted(delivered) == ["Beauty", "Outlet"]
+    assert all(result.error is None and len(result.deals) == 1 for result in results)
+
+
+def test_timed_out_cycle_fails_its_open_jobs(tmp_path):
+    broker = make_broker(tmp_path)
+    coordinator = Coordinator(broker, poll_interval=0.01)
+
+    async def run():
+        results = await coordinator.run_cycle(SITES, cycle_id="cycle", timeout=0.05)
+        # Workers arriving late find nothing to lease, and stale results are ignored
+        assert await broker.lease("worker-a") is None
+        job_id = (await broker.enqueue("cycle", build_scrape_jobs(SITES)))[0]
+        assert not await broker.submit(job_id, "token", "worker-a", [DEAL])
+        return results, await broker.cycle_status("cycle")
+
+    results, status = asyncio.run(run())
+    assert [str(result.error) for result in results] == ["no result from any worker"] * 2
+    assert status == {"failed": 2}
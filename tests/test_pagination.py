@@ -0,0 +1,119 @@
+import asyncio
+import json
+
+from promotions_api import more_pages_signal
+from scraper import AmazonDealsScraper
+from benchmarks.bench_parse import synthetic_promotions
+
+
+class FakeRequest:
+    url = "https://data.amazon.es/api/marketplaces/A1RKKUPIHCS9HS/promotions"
+
+
+class FakeResponse:
+    def __init__(self, entity, status=200, request=None):
+        self.request = request or FakeRequest()
+        self.url = self.request.url
+        self.status = status
+        self._body = json.dumps({"entity": entity}).encode()
+
+    async def body(self):
+        return self._body
+
+
+class FakePage:
+    """Records event handlers; scrolling and clicking load nothing"""
+
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    async def evaluate(self, script):
+        return None
+
+
+def make_scraper():
+    scraper = AmazonDealsScraper(category="Beauty")
+
+    async def no_button(page):
+        return None
+
+    scraper._find_show_more_selector = no_button
+    return scraper
+
+
+def record_waits(scraper):
+    timeouts = []
+
+    async def wait(since, timeout):
+        timeouts.append(timeout)
+        return False
+
+    scraper._wait_for_promotions = wait
+    return timeouts
+
+
+def test_more_pages_signal():
+    assert more_pages_signal({"hasMore": False, "nextToken": "x"}) is False
+    assert more_pages_signal({"rankedPromotions": [], "hasMore": True}) is True
+    assert more_pages_signal({"page": {"nextPageToken": "abc"}}) is True
+    assert more_pages_signal({"rankedPromotions": []}) is None
+
+
+def test_exhausted_category_without_signal_ends_after_short_probe():
+    scraper = make_scraper()
+    timeouts = record_waits(scraper)
+    asyncio.run(scraper._paginate(FakePage()))
+    assert timeouts == [scraper.RESPONSE_TIMEOUT, scraper.FINAL_PROBE_TIMEOUT]
+
+
+def test_waits_full_attempts_while_api_says_more():
+    scraper = make_scraper()
+    scraper._more_pages = True
+    timeouts = record_waits(scraper)
+    asyncio.run(scraper._paginate(FakePage()))
+    assert timeouts == [scraper.RESPONSE_TIMEOUT] * scraper.MAX_NO_NEW_ATTEMPTS
+
+
+def handle(scraper, entity, status=200):
+    page = FakePage()
+    request = FakeRequest()
+
+    async def run():
+        await scraper.intercept_api_calls(page)
+        page.handlers["request"](request)
+        await page.handlers["response"](FakeResponse(entity, status, request))
+
+    asyncio.run(run())
+
+
+def test_empty_page_does_not_end_when_api_says_more():
+    scraper = make_scraper()
+    handle(scraper, {"rankedPromotions": [], "hasMore": True})
+    assert not scraper._no_more_pages
+    handle(scraper, {"rankedPromotions": synthetic_promotions(3), "hasMore": False})
+    assert scraper._no_more_pages
+    assert len(scraper.deals) == 3
+
+
+def test_empty_page_without_signal_ends_category():
+    scraper = make_scraper()
+    handle(scraper, {"rankedPromotions": []})
+    assert scraper._no_more_pages
+
+
+def test_request_categories_are_forgotten():
+    scraper = make_scraper()
+    handle(scraper, {"rankedPromotions": synthetic_promotions(2)})
+    handle(scraper, {"error": "throttled"}, status=503)
+    handle(scraper, {"rankedPromotions": "not a list"})
+    assert scraper._request_categories == {}
+
+    page = FakePage()
+    request = FakeRequest()
+    asyncio.run(scraper.intercept_api_calls(page))
+    page.handlers["request"](request)
+    page.handlers["requestfailed"](request)
+    assert scraper._request_categories == {}
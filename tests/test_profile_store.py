@@ -0,0 +1,76 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from profile_store import PROFILE_MARKER, ProfileStore
+
+
+class FakePool:
+    """Tracks persistent contexts by directory like BrowserPool"""
+
+    def __init__(self):
+        self.contexts = set()
+        self.launches = 0
+        self.closed = []
+
+    def has_persistent_context(self, user_data_dir):
+        return user_data_dir in self.contexts
+
+    @asynccontextmanager
+    async def persistent_page(self, user_data_dir):
+        if user_data_dir not in self.contexts:
+            assert os.path.isdir(user_data_dir)
+            self.contexts.add(user_data_dir)
+            self.launches += 1
+        yield user_data_dir
+
+    async def close_persistent(self, user_data_dir):
+        if user_data_dir in self.contexts:
+            self.contexts.remove(user_data_dir)
+            self.closed.append(user_data_dir)
+
+
+def test_invalidate_closes_and_removes_user_data_dir(tmp_path):
+    store = ProfileStore(user_data_dir=str(tmp_path / "profile"))
+    pool = FakePool()
+
+    async def run():
+        async with store.page(pool) as path:
+            open(os.path.join(path, "Cookies"), "w").close()
+            # Invalidated while its page is open: removed once the page closes
+            await store.invalidate(pool)
+            assert os.path.exists(os.path.join(path, "Cookies"))
+        assert not os.path.exists(path)
+        assert pool.closed == [path]
+        async with store.page(pool) as path:
+            assert os.path.exists(os.path.join(path, PROFILE_MARKER))
+
+    asyncio.run(run())
+    assert pool.launches == 2
+
+
+def test_expired_user_data_dir_is_recycled_while_open(tmp_path):
+    store = ProfileStore(user_data_dir=str(tmp_path / "profile"), max_age_hours=1)
+    pool = FakePool()
+
+    async def run():
+        async with store.page(pool) as path:
+            pass
+        assert pool.has_persistent_context(path)
+        # Age the profile past max_age_hours while its context stays open
+        marker = os.path.join(path, PROFILE_MARKER)
+        os.utime(marker, (os.path.getmtime(marker) - 7200,) * 2)
+        async with store.page(pool):
+            pass
+
+    asyncio.run(run())
+    assert pool.launches == 2
+    assert len(pool.closed) == 1
+
+
+def test_user_data_dir_is_not_shared_between_owners(tmp_path):
+    directory = str(tmp_path / "profile")
+    first = ProfileStore(user_data_dir=directory)
+    second = ProfileStore(user_data_dir=directory)
+    assert first._lock_user_data_dir() == directory
+    assert second._lock_user_data_dir() == f"{directory}.1"
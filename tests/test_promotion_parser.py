@@ -0,0 +1,71 @@
+import copy
+
+import pytest
+
+from benchmarks.bench_parse import synthetic_promotions
+from deal import Deal
+from promotion_parser import PromotionExtractor
+from scraper import AmazonDealsScraper
+
+# Values each part of a promotion is replaced with, "DELETE" removing it
+REPLACEMENTS = ["DELETE", None, "x", "", [], {}, [1], 0, 5, True, "12.5", "1.999", "-3.00", "abc", "12.99"]
+
+
+def paths(data, prefix=()):
+    """Yield the path of every key and list item below ``data``"""
+    items = data.items() if isinstance(data, dict) else enumerate(data) if isinstance(data, list) else ()
+    for key, value in items:
+        yield prefix + (key,)
+        yield from paths(value, prefix + (key,))
+
+
+def mutations(promotion):
+    for path in paths(promotion):
+        for replacement in REPLACEMENTS:
+            mutated = copy.deepcopy(promotion)
+            parent = mutated
+            for key in path[:-1]:
+                parent = parent[key]
+            if replacement == "DELETE":
+                del parent[path[-1]]
+            else:
+                parent[path[-1]] = replacement
+            yield mutated
+
+
+def values(deal):
+    return tuple(getattr(deal, slot) for slot in Deal.__slots__)
+
+
+@pytest.fixture(scope="module")
+def parsers():
+    scraper = AmazonDealsScraper(category="Beauty")
+    return scraper.parse_promotion, PromotionExtractor(scraper._site_id, scraper.parse_promotion)
+
+
+def test_well_formed_promotions_parse_the_same(parsers):
+    parse_promotion, extractor = parsers
+    promotions = synthetic_promotions(200)
+    assert [values(deal) for deal in extractor.extract(promotions, "Beauty")] == [
+        values(parse_promotion(promotion, "Beauty")) for promotion in promotions
+    ]
+
+
+@pytest.mark.parametrize("index", range(3))
+def test_mutated_promotions_match_parse_promotion(parsers, index):
+    parse_promotion, extractor = parsers
+    promotion = synthetic_promotions(3)[index]
+    for mutated in mutations(promotion):
+        expected = parse_promotion(mutated, "Beauty")
+        extracted = extractor.extract([mutated], "Beauty")
+        if expected is None:
+            # parse_promotion drops promotions with a mistyped field; the
+            # extractor may keep them with that field empty
+            assert len(extracted) <= 1
+        else:
+            assert [values(deal) for deal in extracted] == [values(expected)], mutated
+
+
+def test_promotions_that_are_not_dicts_go_to_the_fallback(parsers):
+    _, extractor = parsers
+    assert extractor.extract([None, 5, "x", []], "Beauty") == []
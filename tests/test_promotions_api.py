@@ -0,0 +1,60 @@
+import json
+from urllib.parse import parse_qs, urlsplit
+
+from promotions_api import CapturedRequest
+
+API_URL = "https://www.amazon.es/d2b/api/v1/products/search"
+
+
+def captured(url=API_URL, body=None, entity=None, headers=None):
+    headers = headers or {"content-type": "application/json", "Cookie": "x", ":authority": "amazon.es"}
+    return CapturedRequest("POST", url, headers, json.dumps(body) if body is not None else None, entity)
+
+
+def query(url):
+    return {key: values[0] for key, values in parse_qs(urlsplit(url).query).items()}
+
+
+def test_headers_the_replay_must_not_send_are_dropped():
+    assert captured().headers == {"content-type": "application/json"}
+
+
+def test_offset_in_body_advances_by_received_count():
+    request = captured(body={"filters": {"startIndex": 30, "pageSize": 30}}, entity={"hasMore": True})
+    url, body = request.next_page(received=30)
+    assert url == API_URL
+    assert body == {"filters": {"startIndex": 60, "pageSize": 30}}
+    # The captured body is left alone
+    assert request.body["filters"]["startIndex"] == 30
+
+
+def test_page_number_in_query_advances_by_one():
+    request = captured(url=API_URL + "?pageNumber=2&rank=1")
+    url, body = request.next_page(received=30)
+    assert query(url) == {"pageNumber": "3", "rank": "1"}
+    assert body is None
+
+
+def test_next_page_token_wins_over_offsets():
+    request = captured(body={"startIndex": 0, "nextToken": "t1"}, entity={"page": {"nextToken": "t2"}})
+    _, body = request.next_page(received=30)
+    assert body == {"startIndex": 0, "nextToken": "t2"}
+
+    request = captured(url=API_URL + "?cursor=c1", entity={"cursor": "c2"})
+    url, _ = request.next_page(received=30)
+    assert query(url) == {"cursor": "c2"}
+
+
+def test_unknown_pagination_gives_none():
+    assert captured(body={"query": "lego"}).next_page(received=30) is None
+    assert captured(url=API_URL + "?startIndex=abc").next_page(received=30) is None
+
+
+def test_following_keeps_headers_and_has_more():
+    request = captured(body={"startIndex": 0}, entity={"hasMore": True})
+    url, body = request.next_page(received=10)
+    following = request.following(url, body, {"hasMore": False})
+    assert following.headers == request.headers
+    assert following.next_page(received=10)[1] == {"startIndex": 20}
+    assert request.has_more() and not following.has_more()
+    assert captured().has_more()
@@ -0,0 +1,85 @@
+import asyncio
+import copy
+
+from benchmarks.bench_parse import synthetic_promotions
+from scrape_runner import build_scrape_jobs, run_scrape_jobs
+from scraper import AmazonDealsScraper
+from tests.test_pagination import FakePage, FakeResponse
+
+SITES = [{
+    "name": "Amazon Spain",
+    "base_url": "https://www.amazon.es/-/en/deals",
+    "marketplace_id": "A1RKKUPIHCS9HS",
+    "categories": ["Beauty", "Outlet"],
+}]
+
+
+def fake_scrape(monkeypatch, pages, page_size):
+    async def scrape(self, max_pages=None):
+        # Stands in for the browser: one intercepted promotions page at a time
+        promotions = synthetic_promotions(pages * page_size)
+        for start in range(0, len(promotions), page_size):
+            await self._wait_for_stream_space()
+            await self._emit(self._ingest_promotions(promotions[start:start + page_size]))
+        return self.deals
+
+    monkeypatch.setattr(AmazonDealsScraper, "scrape", scrape)
+
+
+def test_on_deal_streams_deals_before_the_result(monkeypatch):
+    fake_scrape(monkeypatch, pages=3, page_size=10)
+    events = []
+
+    async def on_deal(job, deal):
+        events.append(("deal", job.category, deal))
+
+    async def on_result(result):
+        events.append(("result", result.job.category, result))
+
+    results = asyncio.run(run_scrape_jobs(
+        build_scrape_jobs(SITES), None, global_limit=2, per_site_limit=2,
+        on_result=on_result, on_deal=on_deal,
+    ))
+
+    for result in results:
+        assert result.error is None
+        category = result.job.category
+        streamed = [deal for kind, name, deal in events if kind == "deal" and name == category]
+        assert len(streamed) == 30
+        assert streamed == result.deals
+        # Every deal of the category came through before its result
+        result_at = events.index(("result", category, result))
+        assert all(events.index(("deal", category, deal)) < result_at for deal in streamed)
+
+
+def test_without_on_deal_only_results_are_reported(monkeypatch):
+    fake_scrape(monkeypatch, pages=2, page_size=5)
+    results = asyncio.run(run_scrape_jobs(build_scrape_jobs(SITES), None))
+    assert [len(result.deals) for result in results] == [10, 10]
+
+
+def test_deals_updated_in_place_are_streamed_again(monkeypatch):
+    async def scrape(self, max_pages=None):
+        # Promotions pages arrive through the scraper's response handler
+        page = FakePage()
+        await self.intercept_api_calls(page)
+        promotions = synthetic_promotions(10)
+        repeat = copy.deepcopy(promotions[3])
+        price = repeat["product"]["entity"]["buyingOptions"][0]["price"]["entity"]["priceToPay"]
+        price["moneyValueOrRange"]["value"]["amount"] = "1.00"
+        for promotions_page in (promotions, promotions[:5], [repeat]):
+            await page.handlers["response"](FakeResponse({"rankedPromotions": promotions_page}))
+        return self.deals
+
+    monkeypatch.setattr(AmazonDealsScraper, "scrape", scrape)
+    streamed = []
+
+    async def on_deal(job, deal):
+        streamed.append((deal, deal.price_cents))
+
+    (result,) = asyncio.run(run_scrape_jobs(build_scrape_jobs([dict(SITES[0], categories=["Beauty"])]), None,
+                                            on_deal=on_deal))
+    # Ten new deals, then the one whose price changed; unchanged repeats are not sent
+    assert len(streamed) == 11
+    assert streamed[-1][0] is result.deals[3]
+    assert streamed[-1][1] == 100
@@ -0,0 +1,62 @@
+import asyncio
+
+from scraper import AmazonDealsScraper
+from benchmarks.bench_parse import synthetic_promotions
+
+
+def make_scraper(deal_count):
+    scraper = AmazonDealsScraper(category="Beauty")
+    deals = scraper._extractor.extract(synthetic_promotions(deal_count), scraper.category)
+
+    async def scrape(max_pages=None):
+        # Stands in for the browser: intercepts one deal at a time
+        for deal in deals:
+            await scraper._wait_for_stream_space()
+            await scraper._emit([deal])
+        return scraper.deals
+
+    scraper.scrape = scrape
+    return scraper, deals
+
+
+def test_stream_yields_every_deal():
+    scraper, deals = make_scraper(50)
+
+    async def consume():
+        return [deal async for deal in scraper.scrape_stream(queue_size=2)]
+
+    assert asyncio.run(asyncio.wait_for(consume(), 5)) == deals
+    assert scraper._stream_queue is None
+
+
+def test_stream_early_break_with_full_queue():
+    scraper, deals = make_scraper(50)
+
+    async def consume():
+        stream = scraper.scrape_stream(queue_size=2)
+        async for deal in stream:
+            # Let the producer fill the queue before leaving
+            await asyncio.sleep(0.05)
+            break
+        await stream.aclose()
+        return deal
+
+    assert asyncio.run(asyncio.wait_for(consume(), 5)) == deals[0]
+    assert scraper._stream_queue is None
+    assert scraper._retain_deals
+
+
+def test_stream_consumer_error_with_full_queue():
+    scraper, _ = make_scraper(50)
+
+    async def consume():
+        async for _ in scraper.scrape_stream(queue_size=2):
+            await asyncio.sleep(0.05)
+            raise ValueError("consumer failed")
+
+    try:
+        asyncio.run(asyncio.wait_for(consume(), 5))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("the consumer error was swallowed")
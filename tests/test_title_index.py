@@ -0,0 +1,68 @@
+from deal import Deal
+from title_index import RANKED_SCAN_MIN_MATCHES, TitleIndex, fold, tokenize
+
+
+def make_index(*titles):
+    index = TitleIndex()
+    for key, (title, discount) in enumerate(titles):
+        index.add(key, Deal(asin=f"A{key}", title=title, discount_percent=discount))
+    return index
+
+
+def titles(deals):
+    return [deal.title for deal in deals]
+
+
+def test_fold_and_tokenize():
+    assert fold("Cámara Straße") == "camara strasse"
+    assert tokenize("Lego, LEGO City!") == {"lego", "city"}
+    assert tokenize(None) == set()
+
+
+def test_all_words_must_match_in_any_order():
+    index = make_index(("Lego City Police", 10), ("Lego Star Wars", 20), ("City Bike", 30))
+    assert titles(index.search("city lego")) == ["Lego City Police"]
+    assert index.search("lego train") == []
+
+
+def test_or_prefix_and_accents():
+    index = make_index(("Cámara Réflex", 10), ("Zahnbürste Elektrisch", 20), ("Camping Stove", 30))
+    assert titles(index.search("camara")) == ["Cámara Réflex"]
+    assert titles(index.search("zahnburste | reflex")) == ["Zahnbürste Elektrisch", "Cámara Réflex"]
+    assert titles(index.search("cam*")) == ["Camping Stove", "Cámara Réflex"]
+
+
+def test_results_ranked_by_discount_and_limited():
+    index = make_index(("Lego A", 5), ("Lego B", None), ("Lego C", 50))
+    assert titles(index.search("lego")) == ["Lego C", "Lego A", "Lego B"]
+    assert titles(index.search("lego", limit=1)) == ["Lego C"]
+    assert titles(index.search("lego", where=lambda deal: deal.discount_percent)) == ["Lego C", "Lego A"]
+
+
+def test_ranked_scan_matches_full_sort():
+    count = RANKED_SCAN_MIN_MATCHES + 100
+    index = make_index(*((f"Lego set {n}", n % 97) for n in range(count)))
+    everything = index.search("lego")
+    assert index.search("lego", limit=25) == everything[:25]
+    assert index.search("lego set", limit=25, where=lambda deal: deal.discount_percent % 2) == [
+        deal for deal in everything if deal.discount_percent % 2
+    ][:25]
+
+
+def test_re_adding_a_key_replaces_its_entry():
+    index = make_index(("Lego City", 10))
+    index.add(0, Deal(asin="A0", title="Duplo Farm", discount_percent=10))
+    assert index.search("lego") == []
+    assert titles(index.search("duplo")) == ["Duplo Farm"]
+    assert len(index) == 1
+
+
+def test_remove_and_retain():
+    index = make_index(("Lego City", 10), ("Lego Star", 20), ("Duplo Farm", 30))
+    index.remove(1)
+    index.remove("unknown")
+    assert titles(index.search("lego")) == ["Lego City"]
+    index.retain({2})
+    assert index.search("lego") == []
+    assert index.search_keys("duplo") == {2}
+    assert len(index) == 1
@@ -0,0 +1,169 @@
+import bisect
+import re
+import unicodedata
+
+
+_TOKEN_RE = re.compile(r"\w+")
+# A query word, optionally ending in "*" for a prefix match
+_TERM_RE = re.compile(r"\w+\*?")
+_OR_RE = re.compile(r"\s+(?:OR|\|)\s+|\|")
+
+# With a limit and at least this many candidate matches, walk the deals in
+# discount order and stop at the limit instead of sorting every match
+RANKED_SCAN_MIN_MATCHES = 512
+
+
+def fold(text):
+    """Lowercase ``text`` and strip accents, so "Cámara" and "camara" match ("ß" becomes "ss")"""
+    text = text.casefold()
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    """Return the distinct normalized words of ``text``"""
+    return set(_TOKEN_RE.findall(fold(text))) if text else set()
+
+
+def _discount_rank(deal):
+    discount = deal.discount_percent
+    return -(discount if discount is not None else -1)
+
+
+class TitleIndex:
+    """Inverted index from normalized title words to deals.
+
+    Entries are added under a caller-chosen key, and adding a key again
+    replaces its deal (re-indexing only if the title changed), so the index
+    can follow a deal set that is updated in place. Queries are words that
+    must all match; ``OR`` (or ``|``) separates alternatives, and a word
+    ending in ``*`` matches as a prefix. Results come ranked by discount.
+    """
+
+    def __init__(self):
+        self._deals = {}
+        self._titles = {}
+        self._ranks = {}
+        self._postings = {}
+        # Sorted words and discount-ordered keys, rebuilt on demand after changes
+        self._vocabulary = None
+        self._ranked = None
+
+    def __len__(self):
+        return len(self._deals)
+
+    def _unlink(self, key, tokens):
+        for token in tokens:
+            keys = self._postings.get(token)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[token]
+                    self._vocabulary = None
+
+    def add(self, key, deal):
+        """Index ``deal`` under ``key``, replacing what was there"""
+        rank = _discount_rank(deal)
+        if self._ranks.get(key) != rank:
+            self._ranks[key] = rank
+            self._ranked = None
+        self._deals[key] = deal
+
+        title = deal.title
+        known = key in self._titles
+        if known and self._titles[key] == title:
+            return
+        old_tokens = tokenize(self._titles[key]) if known else set()
+        new_tokens = tokenize(title)
+        self._unlink(key, old_tokens - new_tokens)
+        for token in new_tokens - old_tokens:
+            keys = self._postings.get(token)
+            if keys is None:
+                keys = self._postings[token] = set()
+                self._vocabulary = None
+            keys.add(key)
+        self._titles[key] = title
+
+    def remove(self, key):
+        if key not in self._deals:
+            return
+        self._unlink(key, tokenize(self._titles.pop(key)))
+        del self._deals[key]
+        del self._ranks[key]
+        self._ranked = None
+
+    def retain(self, keys):
+        """Remove every entry whose key is not in ``keys``"""
+        for key in [key for key in self._deals if key not in keys]:
+            self.remove(key)
+
+    def _keys_for(self, term):
+        if not term.endswith("*"):
+            return self._postings.get(term, set())
+
+        prefix = term.rstrip("*")
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        vocabulary = self._vocabulary
+        keys = set()
+        for position in range(bisect.bisect_left(vocabulary, prefix), len(vocabulary)):
+            token = vocabulary[position]
+            if not token.startswith(prefix):
+                break
+            keys |= self._postings[token]
+        return keys
+
+    def _groups(self, query):
+        """Return the key sets of each OR alternative of ``query``, smallest first"""
+        groups = []
+        for alternative in _OR_RE.split(query):
+            terms = _TERM_RE.findall(fold(alternative))
+            if not terms:
+                continue
+            candidates = sorted((self._keys_for(term) for term in terms), key=len)
+            if candidates[0]:
+                groups.append(candidates)
+        return groups
+
+    def search_keys(self, query):
+        """Return the keys of the entries matching ``query``"""
+        matches = set()
+        for candidates in self._groups(query):
+            matches |= candidates[0].intersection(*candidates[1:])
+        return matches
+
+    def search(self, query, limit=None, where=None):
+        """Return the deals matching ``query``, highest discount first.
+
+        ``where`` is an optional predicate the deals must also satisfy.
+        """
+        groups = self._groups(query)
+        if limit and sum(len(candidates[0]) for candidates in groups) >= RANKED_SCAN_MIN_MATCHES:
+            return self._ranked_scan(groups, limit, where)
+
+        matches = set()
+        for candidates in groups:
+            matches |= candidates[0].intersection(*candidates[1:])
+        deals = [self._deals[key] for key in matches]
+        if where is not None:
+            deals = [deal for deal in deals if where(deal)]
+        deals.sort(key=_discount_rank)
+        return deals[:limit] if limit else deals
+
+    def _ranked_scan(self, groups, limit, where):
+        if self._ranked is None:
+            ranks = self._ranks
+            self._ranked = sorted(ranks, key=ranks.__getitem__)
+        results = []
+        for key in self._ranked:
+            if not any(all(key in keys for keys in candidates) for candidates in groups):
+                continue
+            deal = self._deals[key]
+            if where is not None and not where(deal):
+                continue
+            results.append(deal)
+            if len(results) == limit:
+                break
+        return results
@@ -0,0 +1,176 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import re
+import time
+
+from browser_pool import BrowserPool
+from scraper import AmazonDealsScraper
+from network_profile import get_network_profile
+
+
+DEFAULT_RECORDINGS_DIR = "recordings"
+HAR_FILENAME = "traffic.har.zip"
+PROMOTIONS_DIRNAME = "promotions"
+
+# Served once the recorded promotions pages run out, so the scraper sees the end
+EMPTY_PROMOTIONS = {"entity": {"rankedPromotions": []}}
+
+
+def recording_dir(root, site_name, category):
+    """Return the directory holding the recording of one site/category"""
+    def slug(value):
+        return re.sub(r"[^a-z0-9]+", "_", (value or "all").lower()).strip("_")
+
+    return os.path.join(root, slug(site_name), slug(category))
+
+
+class TrafficRecorder:
+    """Records a scrape's traffic: a HAR of the whole page plus every promotions response"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.har_path = os.path.join(directory, HAR_FILENAME)
+        self.promotions_dir = os.path.join(directory, PROMOTIONS_DIRNAME)
+        self.pages_recorded = 0
+
+    def context_options(self):
+        os.makedirs(self.promotions_dir, exist_ok=True)
+        for old_page in glob.glob(os.path.join(self.promotions_dir, "*.json")):
+            os.remove(old_page)
+        return {"record_har_path": self.har_path}
+
+    async def attach(self, page, api_url):
+        async def save_promotions(response):
+            if api_url not in response.url or response.status != 200:
+                return
+            try:
+                body = await response.body()
+            except Exception:
+                return
+            self.pages_recorded += 1
+            path = os.path.join(self.promotions_dir, f"{self.pages_recorded:04d}.json")
+            with open(path, 'wb') as f:
+                f.write(body)
+
+        page.on("response", save_promotions)
+
+
+class TrafficReplayer:
+    """Serves a recording back through Playwright routing; nothing reaches the network.
+
+    The page and its assets come from the HAR. Promotions requests are
+    answered with the recorded JSON pages in order, whatever their cursor,
+    followed by an empty page. ``latency`` adds a delay to each promotions
+    response to imitate the network.
+    """
+
+    def __init__(self, directory, latency=0.0):
+        self.directory = directory
+        self.har_path = os.path.join(directory, HAR_FILENAME)
+        self.latency = latency
+        self.pages = []
+        for path in sorted(glob.glob(os.path.join(directory, PROMOTIONS_DIRNAME, "*.json"))):
+            with open(path, 'rb') as f:
+                self.pages.append(f.read())
+        if not self.pages and not os.path.exists(self.har_path):
+            raise FileNotFoundError(f"No recording found in {directory}")
+
+    def context_options(self):
+        return {}
+
+    async def attach(self, page, api_url):
+        # Registered first so it only sees what the handlers below fall back on
+        await page.route("**/*", lambda route: route.abort("internetdisconnected"))
+        if os.path.exists(self.har_path):
+            await page.route_from_har(self.har_path, not_found="fallback")
+
+        served = 0
+
+        async def serve_promotions(route):
+            nonlocal served
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if served < len(self.pages):
+                body = self.pages[served]
+                served += 1
+                await route.fulfill(status=200, content_type="application/json", body=body)
+            else:
+                await route.fulfill(status=200, json=EMPTY_PROMOTIONS)
+
+        await page.route(re.compile(re.escape(api_url)), serve_promotions)
+
+
+def _find_site(config_path, site_name):
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    for site in config.get("sites", []):
+        if site.get("name") == site_name:
+            return site
+    raise SystemExit(f"Site '{site_name}' not found in {config_path}")
+
+
+def _make_scraper(site, category, pool, traffic):
+    return AmazonDealsScraper(
+        marketplace_id=site.get("marketplace_id"),
+        category=category,
+        base_url=site.get("base_url"),
+        site_name=site.get("name"),
+        browser_pool=pool,
+        network_profile=get_network_profile(site.get("network_profile")),
+        traffic=traffic,
+    )
+
+
+async def record(site, category, directory, max_pages=None):
+    """Scrape one category live and save its traffic to ``directory``"""
+    recorder = TrafficRecorder(directory)
+    async with BrowserPool() as pool:
+        scraper = _make_scraper(site, category, pool, recorder)
+        await scraper.scrape(max_pages=max_pages)
+    print(f"✓ Recorded {recorder.pages_recorded} promotions pages and "
+          f"{len(scraper.deals)} deals to {directory}")
+
+
+async def replay(site, category, directory, runs=1, latency=0.0, max_pages=None):
+    """Scrape a recording offline ``runs`` times; returns the wall time of each run"""
+    timings = []
+    async with BrowserPool() as pool:
+        for run in range(1, runs + 1):
+            scraper = _make_scraper(site, category, pool, TrafficReplayer(directory, latency))
+            started = time.perf_counter()
+            await scraper.scrape(max_pages=max_pages)
+            elapsed = time.perf_counter() - started
+            timings.append(elapsed)
+            print(f"⏱️  Run {run}/{runs}: {len(scraper.deals)} deals in {elapsed:.2f}s")
+
+    if runs > 1:
+        print(f"⏱️  Best {min(timings):.2f}s, mean {sum(timings) / len(timings):.2f}s over {runs} runs")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay Amazon deals traffic")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("--site", required=True, help="site name from config.json")
+    parser.add_argument("--category", help="category to scrape (default: all)")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--dir", default=DEFAULT_RECORDINGS_DIR, help="root directory of recordings")
+    parser.add_argument("--max-pages", type=int)
+    parser.add_argument("--runs", type=int, default=1, help="replay: number of timed runs")
+    parser.add_argument("--latency", type=float, default=0.0, help="replay: seconds per promotions response")
+    args = parser.parse_args()
+
+    site = _find_site(args.config, args.site)
+    directory = recording_dir(args.dir, site.get("name"), args.category)
+
+    if args.mode == "record":
+        asyncio.run(record(site, args.category, directory, args.max_pages))
+    else:
+        asyncio.run(replay(site, args.category, directory, args.runs, args.latency, args.max_pages))
+
+
+if __name__ == "__main__":
+    main()